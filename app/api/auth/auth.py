@@ -7,11 +7,11 @@ from datetime import datetime, timedelta
 
 from db.models import User
 from api.schemas import UserRegister, TokenResponse, MessageResponse
-from api.dependencies import get_current_user
+from api.dependencies import get_current_user, json_body, json_body_openapi
 from api.exceptions import AuthException, BadRequestException
 from config import (
-    verify_password,
-    get_password_hash,
+    averify_password,
+    aget_password_hash,
     create_user_access_token,
     create_access_token
 )
@@ -20,15 +20,14 @@ from config import settings
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 
-@router.post("/register", response_model=TokenResponse)
-async def register(user_data: UserRegister):
+@router.post("/register", response_model=TokenResponse, openapi_extra=json_body_openapi(UserRegister))
+async def register(user_data: UserRegister = Depends(json_body(UserRegister))):
     # Check if user already exists
-    existing_user = await User.get_or_none(email=user_data.email)
-    if existing_user:
+    if await User.filter(email=user_data.email).exists():
         raise BadRequestException("User with this email already exists")
 
-    # Create new user
-    hashed_password = get_password_hash(user_data.password)
+    # Create new user (хеширование выполняется вне event loop)
+    hashed_password = await aget_password_hash(user_data.password)
     user = await User.create(
         email=user_data.email,
         first_name=user_data.first_name,
@@ -55,7 +54,7 @@ async def register(user_data: UserRegister):
 async def login(form_data: OAuth2PasswordRequestForm = Depends()):
     user = await User.get_or_none(email=form_data.username)
 
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    if not user or not await averify_password(form_data.password, user.hashed_password):
         raise AuthException("Incorrect email or password")
 
     # Create access token
@@ -4,7 +4,7 @@ from typing import List
 
 from db.models import Category, User
 from api.schemas import BaseCategory, CategoryCreate
-from api.dependencies import get_current_user
+from api.dependencies import get_current_user, json_body, json_body_openapi
 from api.exceptions import BadRequestException
 
 router = APIRouter(prefix="/categories", tags=["categories"])
@@ -16,14 +16,13 @@ async def get_categories():
     return categories
 
 
-@router.post("/", response_model=BaseCategory)
+@router.post("/", response_model=BaseCategory, openapi_extra=json_body_openapi(CategoryCreate))
 async def create_category(
-        category_data: CategoryCreate,
-        current_user: User = Depends(get_current_user)
+        current_user: User = Depends(get_current_user),
+        category_data: CategoryCreate = Depends(json_body(CategoryCreate))
 ):
     # Check if category already exists
-    existing_category = await Category.get_or_none(name=category_data.name)
-    if existing_category:
+    if await Category.filter(name=category_data.name).exists():
         raise BadRequestException("Category with this name already exists")
 
     # Create category
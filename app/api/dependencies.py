@@ -1,43 +1,49 @@
 # app/api/dependencies.py
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.exceptions import RequestValidationError
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from jose import JWTError, jwt
-from typing import Optional
+import jwt
+from pydantic import BaseModel, ValidationError
+from typing import Any, Awaitable, Callable, Dict, Optional, Type, TypeVar
 from db.models import User
-from config import settings
-import re
+from config import ALGORITHM, SECRET_KEY
 
 # Две схемы безопасности
 security_required = HTTPBearer()  # Для обязательной аутентификации
 security_optional = HTTPBearer(auto_error=False)  # Для опциональной аутентификации
 
+# Ошибка авторизации создается один раз, а не на каждый запрос
+_credentials_exception = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Could not validate credentials",
+    headers={"WWW-Authenticate": "Bearer"},
+)
+
+# Декодер JWT, ключ и список алгоритмов подготавливаются один раз при импорте
+_jwt_decoder = jwt.PyJWT(options={"verify_iss": False, "verify_aud": False})
+_jwt_key = SECRET_KEY.encode()
+_jwt_algorithms = [ALGORITHM]
+
+async def _get_user_from_token(token: str) -> Optional[User]:
+    """Возвращает пользователя по JWT токену или None, если токен невалиден."""
+    try:
+        payload = _jwt_decoder.decode(token, _jwt_key, algorithms=_jwt_algorithms)
+    except jwt.PyJWTError:
+        return None
+
+    email: str = payload.get("sub")
+    if email is None:
+        return None
+
+    return await User.get_or_none(email=email)
+
 
 async def get_current_user(
         credentials: HTTPAuthorizationCredentials = Depends(security_required)
 ) -> User:
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-
-    try:
-        token = credentials.credentials
-        payload = jwt.decode(
-            token,
-            settings.SECRET_KEY,
-            algorithms=[settings.ALGORITHM],
-            options={"verify_iss": False, "verify_aud": False}
-        )
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-
-    user = await User.get_or_none(email=email)
+    user = await _get_user_from_token(credentials.credentials)
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception
 
     return user
 
@@ -48,19 +54,37 @@ async def get_current_user_optional(
     if credentials is None:
         return None
 
-    try:
-        token = credentials.credentials
-        payload = jwt.decode(
-            token,
-            settings.SECRET_KEY,
-            algorithms=[settings.ALGORITHM],
-            options={"verify_iss": False, "verify_aud": False}  # Добавьте эту строку
-        )
-        email: str = payload.get("sub")
-        if email is None:
-            return None
-    except JWTError:
-        return None
+    return await _get_user_from_token(credentials.credentials)
+
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+def json_body(model: Type[ModelT]) -> Callable[[Request], Awaitable[ModelT]]:
+    """
+    Зависимость, разбирающая JSON тела запроса сразу в модель.
+
+    Тело передается в model_validate_json, поэтому JSON разбирается
+    в pydantic-core без промежуточного dict. field_validator'ы модели
+    выполняются так же, как при обычном разборе тела FastAPI, ошибки
+    возвращаются в том же формате (422, loc начинается с "body").
+    """
+    async def dependency(request: Request) -> ModelT:
+        try:
+            return model.model_validate_json(await request.body())
+        except ValidationError as exc:
+            raise RequestValidationError(
+                [{**error, "loc": ("body", *error["loc"])} for error in exc.errors(include_url=False)]
+            )
+
+    return dependency
+
 
-    user = await User.get_or_none(email=email)
-    return user
\ No newline at end of file
+def json_body_openapi(model: Type[BaseModel]) -> Dict[str, Any]:
+    """Описание тела запроса для openapi_extra эндпоинтов, использующих json_body."""
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": model.model_json_schema()}},
+        }
+    }
@@ -1,9 +1,12 @@
 # app/api/events/events.py
-from fastapi import APIRouter, Depends, Query
-from typing import List, Optional
-from datetime import date, datetime
+import asyncio
+
+from fastapi import APIRouter, Depends, Query, Response
+from typing import List, Optional, Tuple
 
 from db.models import Event, Category, Location, User
+from db.relations import add_relation, change_counter, decrement, remove_relation
+from db.search import apply_event_search
 from api.schemas import (
     BaseEvent,
     EventCreate,
@@ -11,22 +14,166 @@ from api.schemas import (
     EventFilterParams,
     MessageResponse,
     EventWithUserStatus,
-    PaginatedEventsWithStatus
+    PaginatedEventsWithStatus,
+    EVENT_WITH_STATUS_LIST_ADAPTER,
+    today_cached,
 )
-from api.dependencies import get_current_user, get_current_user_optional
+from api.dependencies import get_current_user, get_current_user_optional, json_body, json_body_openapi
 from api.exceptions import (
     NotFoundException,
     ForbiddenException,
     BadRequestException,
     ValidationException
 )
-from fastapi_pagination import Page, add_pagination, paginate
+from fastapi_pagination import Page, add_pagination
 from fastapi_pagination.ext.tortoise import paginate as tortoise_paginate
-from tortoise.expressions import Q
+from tortoise.backends.base.client import BaseDBAsyncClient
+from tortoise.expressions import RawSQL
+from tortoise.queryset import QuerySet
+from tortoise.transactions import in_transaction
 from tortoise.functions import Count
 
 router = APIRouter(prefix="/events", tags=["events"])
 
+# Сортировка списка событий в зависимости от параметра sort_by_likes
+_ORDER = {
+    "desc": ("-likes_count", "-created_at"),
+    "asc": ("likes_count", "-created_at"),
+    None: ("-created_at",),
+}
+
+
+def _status_exists(relation: str, user: User) -> RawSQL:
+    """
+    EXISTS-подзапрос к промежуточной таблице связи события с пользователем.
+
+    Имена таблицы и колонок берутся из описания M2M-поля модели Event.
+    """
+    field = Event._meta.fields_map[relation]
+    return RawSQL(
+        f'EXISTS (SELECT 1 FROM "{field.through}" '
+        f'WHERE "{field.through}"."{field.backward_key}" = "{Event._meta.db_table}"."id" '
+        f'AND "{field.through}"."{field.forward_key}" = {int(user.id)})'
+    )
+
+
+async def _get_event_with_relations(event_id: int) -> Optional[Event]:
+    """
+    Загружает событие вместе с локацией, организатором и категориями.
+
+    Локация и организатор подтягиваются JOIN'ом, категории - одним
+    дополнительным запросом.
+    """
+    return await (
+        Event.filter(id=event_id)
+        .select_related("location", "organizer")
+        .prefetch_related("categories")
+        .first()
+    )
+
+
+async def _find_category_ids(category_ids: List[int]) -> List[int]:
+    """Возвращает id существующих категорий, не загружая сами категории."""
+    return await Category.filter(id__in=category_ids).values_list("id", flat=True)
+
+
+async def _add_categories(
+        event_id: int,
+        category_ids: List[int],
+        connection: Optional[BaseDBAsyncClient] = None,
+) -> None:
+    """Добавляет категории события одним INSERT по их id."""
+    if not category_ids:
+        return
+
+    field = Event._meta.fields_map["categories"]
+    rows = ", ".join(
+        f"({int(event_id)}, {int(category_id)})" for category_id in dict.fromkeys(category_ids)
+    )
+    await (connection or Event._meta.db).execute_query(
+        f'INSERT INTO "{field.through}" ("{field.backward_key}", "{field.forward_key}") VALUES {rows}'
+    )
+
+
+def _annotate_status(
+        query: QuerySet[Event],
+        user: User,
+        is_liked: Optional[bool] = None,
+        is_registered: Optional[bool] = None,
+) -> QuerySet[Event]:
+    """
+    Добавляет в основной SELECT статусы пользователя (лайк/регистрация).
+
+    Статусы вычисляются на стороне БД, поэтому для страницы событий
+    не нужны дополнительные запросы. Заранее известный статус
+    (например, для списка лайкнутых событий) не вычисляется.
+    """
+    if is_liked is None:
+        query = query.annotate(is_liked=_status_exists("liked_by", user))
+    if is_registered is None:
+        query = query.annotate(is_registered=_status_exists("participants", user))
+    return query
+
+
+async def _fetch_page(query: QuerySet[Event], offset: int, size: int) -> Tuple[List[Event], int]:
+    """
+    Получает страницу событий вместе с общим количеством одним запросом.
+
+    Общее количество считается оконной функцией COUNT(*) OVER (),
+    поэтому отдельный COUNT по тому же фильтру не нужен. Если страница
+    оказалась за пределами выборки, количество запрашивается отдельно.
+    """
+    events = await query.annotate(total_count=RawSQL("COUNT(*) OVER ()")).offset(offset).limit(size).all()
+
+    if events:
+        total = events[0].total_count
+    elif offset:
+        total = await query.count()
+    else:
+        total = 0
+
+    return events, total
+
+
+def _events_with_status(
+        events: List[Event],
+        is_liked: Optional[bool] = None,
+        is_registered: Optional[bool] = None,
+) -> List[EventWithUserStatus]:
+    """Собирает ответ из событий, полученных через _annotate_status."""
+    # Статусы, известные заранее, проставляем прямо на модели
+    if is_liked is not None or is_registered is not None:
+        for event in events:
+            if is_liked is not None:
+                event.is_liked = is_liked
+            if is_registered is not None:
+                event.is_registered = is_registered
+
+    # Валидируем всю страницу одним вызовом pydantic-core
+    return EVENT_WITH_STATUS_LIST_ADAPTER.validate_python(events, from_attributes=True)
+
+
+def _paginated_response(
+        items: List[EventWithUserStatus],
+        total: int,
+        page: int,
+        size: int,
+) -> Response:
+    """
+    Сериализует страницу событий в JSON за один проход pydantic-core.
+
+    Элементы уже провалидированы в _events_with_status, поэтому ответ
+    отдается напрямую, без повторной валидации по response_model.
+    """
+    paginated = PaginatedEventsWithStatus.model_construct(
+        items=items,
+        total=total,
+        page=page,
+        size=size,
+        pages=(total + size - 1) // size  # ceil(total / size)
+    )
+    return Response(content=paginated.model_dump_json(), media_type="application/json")
+
 
 @router.get("/public", response_model=Page[BaseEvent], summary="Get Public Events")
 async def get_events(
@@ -34,8 +181,6 @@ async def get_events(
         city: Optional[str] = None,
         search: Optional[str] = None,
         sort_by_likes: Optional[str] = None,
-        page: int = Query(1, ge=1),
-        size: int = Query(20, ge=1, le=100),
         current_user: Optional[User] = Depends(get_current_user_optional)
 ):
     query = Event.all().select_related("location", "organizer").prefetch_related("categories")
@@ -48,22 +193,13 @@ async def get_events(
         query = query.filter(location__city__icontains=city)
 
     if search:
-        query = query.filter(
-            Q(title__icontains=search) |
-            Q(short_description__icontains=search) |
-            Q(full_description__icontains=search)
-        )
+        query = apply_event_search(query, search)
 
     # Apply sorting
-    if sort_by_likes == "desc":
-        query = query.order_by("-likes_count", "-created_at")
-    elif sort_by_likes == "asc":
-        query = query.order_by("likes_count", "-created_at")
-    else:
-        query = query.order_by("-created_at")
+    query = query.order_by(*_ORDER.get(sort_by_likes, _ORDER[None]))
 
     # Filter out past events (only future events)
-    query = query.filter(date__gte=date.today())
+    query = query.filter(date__gte=today_cached())
 
     # Если пользователь авторизован, можем добавить статусы
     # Но FastAPI Pagination не поддерживает кастомные модели с дополнительными полями
@@ -92,55 +228,23 @@ async def get_events_with_status(
         query = query.filter(location__city__icontains=city)
 
     if search:
-        query = query.filter(
-            Q(title__icontains=search) |
-            Q(short_description__icontains=search) |
-            Q(full_description__icontains=search)
-        )
+        query = apply_event_search(query, search)
 
     # Apply sorting
-    if sort_by_likes == "desc":
-        query = query.order_by("-likes_count", "-created_at")
-    elif sort_by_likes == "asc":
-        query = query.order_by("likes_count", "-created_at")
-    else:
-        query = query.order_by("-created_at")
+    query = query.order_by(*_ORDER.get(sort_by_likes, _ORDER[None]))
 
     # Filter out past events (only future events)
-    query = query.filter(date__gte=date.today())
-
-    # Получаем общее количество
-    total = await query.count()
+    query = query.filter(date__gte=today_cached())
 
     # Вычисляем offset и limit для пагинации
     offset = (page - 1) * size
-    events = await query.offset(offset).limit(size).all()
+    # Получаем страницу и общее количество одним запросом
+    events, total = await _fetch_page(_annotate_status(query, current_user), offset, size)
 
     # Добавляем статусы пользователя
-    events_with_status = []
-    for event in events:
-        # Проверяем лайк
-        is_liked = await current_user.liked_events.filter(id=event.id).exists()
-        # Проверяем регистрацию
-        is_registered = await current_user.registered_events.filter(id=event.id).exists()
-
-        # Создаем BaseEvent из модели
-        base_event = BaseEvent.model_validate(event)
-        # Создаем EventWithUserStatus с добавленными статусами
-        event_with_status = EventWithUserStatus(
-            **base_event.model_dump(),
-            is_liked=is_liked,
-            is_registered=is_registered
-        )
-        events_with_status.append(event_with_status)
+    events_with_status = _events_with_status(events)
 
-    return {
-        "items": events_with_status,
-        "total": total,
-        "page": page,
-        "size": size,
-        "pages": (total + size - 1) // size  # ceil(total / size)
-    }
+    return _paginated_response(events_with_status, total, page, size)
 
 
 @router.get("/public/{event_id}", response_model=BaseEvent, summary="Get Public Event")
@@ -148,11 +252,9 @@ async def get_event(
         event_id: int,
         current_user: Optional[User] = Depends(get_current_user_optional)
 ):
-    event = await Event.get_or_none(id=event_id)
+    event = await _get_event_with_relations(event_id)
     if not event:
         raise NotFoundException("Event not found")
-
-    await event.fetch_related("location", "organizer", "categories")
     return event
 
 
@@ -162,42 +264,30 @@ async def get_event_with_status(
         current_user: User = Depends(get_current_user)  # Требуем авторизацию
 ):
     """Получить событие со статусом пользователя (лайк/регистрация)"""
-    event = await Event.get_or_none(id=event_id)
+    event = await _get_event_with_relations(event_id)
     if not event:
         raise NotFoundException("Event not found")
 
-    await event.fetch_related("location", "organizer", "categories")
-
     # Проверяем лайк
     is_liked = await current_user.liked_events.filter(id=event_id).exists()
     # Проверяем регистрацию
     is_registered = await current_user.registered_events.filter(id=event_id).exists()
 
-    # Создаем BaseEvent из модели
-    base_event = BaseEvent.model_validate(event)
-    # Создаем EventWithUserStatus с добавленными статусами
-    event_with_status = EventWithUserStatus(
-        **base_event.model_dump(),
-        is_liked=is_liked,
-        is_registered=is_registered
-    )
-
-    return event_with_status
+    return _events_with_status([event], is_liked=is_liked, is_registered=is_registered)[0]
 
 
-@router.post("/", response_model=BaseEvent)
+@router.post("/", response_model=BaseEvent, openapi_extra=json_body_openapi(EventCreate))
 async def create_event(
-        event_data: EventCreate,
-        current_user: User = Depends(get_current_user)
+        current_user: User = Depends(get_current_user),
+        event_data: EventCreate = Depends(json_body(EventCreate))
 ):
     # Check if location exists
-    location = await Location.get_or_none(id=event_data.location_id)
-    if not location:
+    if not await Location.exists(id=event_data.location_id):
         raise NotFoundException("Location not found")
 
     # Check if categories exist
-    categories = await Category.filter(id__in=event_data.category_ids).all()
-    if len(categories) != len(event_data.category_ids):
+    category_ids = await _find_category_ids(event_data.category_ids)
+    if len(category_ids) != len(event_data.category_ids):
         raise NotFoundException("One or more categories not found")
 
     # Create event
@@ -207,23 +297,22 @@ async def create_event(
         full_description=event_data.full_description,
         date=event_data.date,
         time=event_data.time,
-        location=location,
+        location_id=event_data.location_id,
         organizer=current_user,
     )
 
     # Add categories
-    await event.categories.add(*categories)
+    await _add_categories(event.id, category_ids)
 
     # Fetch related data for response
-    await event.fetch_related("location", "organizer", "categories")
-    return event
+    return await _get_event_with_relations(event.id)
 
 
-@router.put("/{event_id}", response_model=BaseEvent)
+@router.put("/{event_id}", response_model=BaseEvent, openapi_extra=json_body_openapi(EventUpdate))
 async def update_event(
         event_id: int,
-        event_data: EventUpdate,
-        current_user: User = Depends(get_current_user)
+        current_user: User = Depends(get_current_user),
+        event_data: EventUpdate = Depends(json_body(EventUpdate))
 ):
     event = await Event.get_or_none(id=event_id)
     if not event:
@@ -235,31 +324,43 @@ async def update_event(
 
     update_data = event_data.model_dump(exclude_unset=True)
 
-    # Handle location update
+    # Проверки локации и категорий независимы, выполняем их параллельно
+    checks = {}
     if "location_id" in update_data:
-        location = await Location.get_or_none(id=update_data["location_id"])
-        if not location:
-            raise NotFoundException("Location not found")
-        event.location = location
-        del update_data["location_id"]
+        checks["location"] = Location.exists(id=update_data["location_id"])
+    if "category_ids" in update_data:
+        checks["categories"] = _find_category_ids(update_data["category_ids"])
+    results = dict(zip(checks, await asyncio.gather(*checks.values())))
+
+    # Handle location update
+    if "location_id" in update_data and not results["location"]:
+        raise NotFoundException("Location not found")
 
     # Handle categories update
+    category_ids = None
     if "category_ids" in update_data:
-        categories = await Category.filter(id__in=update_data["category_ids"]).all()
-        if len(categories) != len(update_data["category_ids"]):
+        category_ids = results["categories"]
+        if len(category_ids) != len(update_data.pop("category_ids")):
             raise NotFoundException("One or more categories not found")
-        await event.categories.clear()
-        await event.categories.add(*categories)
-        del update_data["category_ids"]
 
     # Update other fields
+    update_fields = []
     for field, value in update_data.items():
         if value is not None:
             setattr(event, field, value)
+            update_fields.append(field)
 
-    await event.save()
-    await event.fetch_related("location", "organizer", "categories")
-    return event
+    # Замена категорий и сохранение события одной транзакцией.
+    # Записываются только измененные поля: счетчики лайков и участников
+    # меняются атомарно другими запросами и не должны перезаписываться
+    async with in_transaction() as connection:
+        if category_ids is not None:
+            await event.categories.clear(using_db=connection)
+            await _add_categories(event.id, category_ids, connection)
+        if update_fields:
+            await event.save(update_fields=[*update_fields, "updated_at"], using_db=connection)
+
+    return await _get_event_with_relations(event.id)
 
 
 @router.delete("/{event_id}", response_model=MessageResponse)
@@ -284,24 +385,22 @@ async def toggle_like(
         event_id: int,
         current_user: User = Depends(get_current_user)
 ):
-    event = await Event.get_or_none(id=event_id)
+    # Событие нужно для ответа, поэтому загружаем его сразу вместо проверки exists()
+    event = await _get_event_with_relations(event_id)
     if not event:
         raise NotFoundException("Event not found")
 
-    # Check if user already liked the event
-    liked = await current_user.liked_events.filter(id=event_id).exists()
-
-    if liked:
-        # Unlike
-        await current_user.liked_events.remove(event)
-        event.likes_count = max(0, event.likes_count - 1)
-    else:
-        # Like
-        await current_user.liked_events.add(event)
-        event.likes_count += 1
+    async with in_transaction() as connection:
+        # Unlike, если лайк уже был, иначе Like
+        liked = not await remove_relation("liked_by", current_user.id, event_id, connection)
+        # Лайк, уже поставленный параллельным запросом, повторно не добавляется
+        # (уникальный индекс) - тогда счетчик остается прежним
+        if not liked or await add_relation("liked_by", current_user.id, event_id, connection):
+            # Атомарно меняем счетчик на стороне БД
+            event.likes_count = await change_counter(event_id, "likes_count", liked, connection)
+        else:
+            await event.refresh_from_db(fields=["likes_count"], using_db=connection)
 
-    await event.save()
-    await event.fetch_related("location", "organizer", "categories")
     return event
 
 
@@ -310,22 +409,18 @@ async def register_for_event(
         event_id: int,
         current_user: User = Depends(get_current_user)
 ):
-    event = await Event.get_or_none(id=event_id)
+    # Событие нужно для ответа, поэтому загружаем его сразу вместо проверки exists()
+    event = await _get_event_with_relations(event_id)
     if not event:
         raise NotFoundException("Event not found")
 
-    # Check if already registered
-    registered = await current_user.registered_events.filter(id=event_id).exists()
-
-    if registered:
-        raise BadRequestException("Already registered for this event")
+    async with in_transaction() as connection:
+        # Register (если уже зарегистрирован, INSERT ничего не добавит)
+        if not await add_relation("participants", current_user.id, event_id, connection):
+            raise BadRequestException("Already registered for this event")
 
-    # Register
-    await current_user.registered_events.add(event)
-    event.participants_count += 1
+        event.participants_count = await change_counter(event_id, "participants_count", True, connection)
 
-    await event.save()
-    await event.fetch_related("location", "organizer", "categories")
     return event
 
 
@@ -334,21 +429,18 @@ async def unregister_from_event(
         event_id: int,
         current_user: User = Depends(get_current_user)
 ):
-    event = await Event.get_or_none(id=event_id)
-    if not event:
+    if not await Event.exists(id=event_id):
         raise NotFoundException("Event not found")
 
-    # Check if registered
-    registered = await current_user.registered_events.filter(id=event_id).exists()
+    async with in_transaction() as connection:
+        # Unregister (если регистрации не было, DELETE ничего не удалит)
+        if not await remove_relation("participants", current_user.id, event_id, connection):
+            raise BadRequestException("Not registered for this event")
 
-    if not registered:
-        raise BadRequestException("Not registered for this event")
-
-    # Unregister
-    await current_user.registered_events.remove(event)
-    event.participants_count = max(0, event.participants_count - 1)
+        await Event.filter(id=event_id).using_db(connection).update(
+            participants_count=decrement("participants_count")
+        )
 
-    await event.save()
     return MessageResponse(message="Successfully unregistered from event")
 
 
@@ -366,37 +458,15 @@ async def get_my_created_events_with_status(
         .order_by("-created_at")
     )
 
-    # Получаем общее количество
-    total = await query.count()
-
     # Вычисляем offset и limit для пагинации
     offset = (page - 1) * size
-    events = await query.offset(offset).limit(size).all()
+    # Получаем страницу и общее количество одним запросом
+    events, total = await _fetch_page(_annotate_status(query, current_user), offset, size)
 
     # Добавляем статусы
-    events_with_status = []
-    for event in events:
-        # Для созданных событий всегда лайк/регистрация от организатора
-        is_liked = await current_user.liked_events.filter(id=event.id).exists()
-        is_registered = await current_user.registered_events.filter(id=event.id).exists()
-
-        # Создаем BaseEvent из модели
-        base_event = BaseEvent.model_validate(event)
-        # Создаем EventWithUserStatus с добавленными статусами
-        event_with_status = EventWithUserStatus(
-            **base_event.model_dump(),
-            is_liked=is_liked,
-            is_registered=is_registered
-        )
-        events_with_status.append(event_with_status)
+    events_with_status = _events_with_status(events)
 
-    return {
-        "items": events_with_status,
-        "total": total,
-        "page": page,
-        "size": size,
-        "pages": (total + size - 1) // size  # ceil(total / size)
-    }
+    return _paginated_response(events_with_status, total, page, size)
 
 
 @router.get("/me/liked", response_model=PaginatedEventsWithStatus, summary="Get My Liked Events")
@@ -413,36 +483,15 @@ async def get_my_liked_events_with_status(
         .order_by("-created_at")
     )
 
-    # Получаем общее количество
-    total = await query.count()
-
     # Вычисляем offset и limit для пагинации
     offset = (page - 1) * size
-    events = await query.offset(offset).limit(size).all()
+    # Получаем страницу и общее количество одним запросом
+    events, total = await _fetch_page(_annotate_status(query, current_user, is_liked=True), offset, size)
 
-    # Добавляем статусы
-    events_with_status = []
-    for event in events:
-        # Для лайкнутых событий всегда is_liked = True
-        is_registered = await current_user.registered_events.filter(id=event.id).exists()
-
-        # Создаем BaseEvent из модели
-        base_event = BaseEvent.model_validate(event)
-        # Создаем EventWithUserStatus с добавленными статусами
-        event_with_status = EventWithUserStatus(
-            **base_event.model_dump(),
-            is_liked=True,  # Всегда true для лайкнутых
-            is_registered=is_registered
-        )
-        events_with_status.append(event_with_status)
+    # Добавляем статусы (для лайкнутых событий всегда is_liked = True)
+    events_with_status = _events_with_status(events, is_liked=True)
 
-    return {
-        "items": events_with_status,
-        "total": total,
-        "page": page,
-        "size": size,
-        "pages": (total + size - 1) // size  # ceil(total / size)
-    }
+    return _paginated_response(events_with_status, total, page, size)
 
 
 @router.get("/me/registered", response_model=PaginatedEventsWithStatus, summary="Get My Registered Events")
@@ -459,49 +508,37 @@ async def get_my_registered_events_with_status(
         .order_by("-created_at")
     )
 
-    # Получаем общее количество
-    total = await query.count()
-
     # Вычисляем offset и limit для пагинации
     offset = (page - 1) * size
-    events = await query.offset(offset).limit(size).all()
+    # Получаем страницу и общее количество одним запросом
+    events, total = await _fetch_page(_annotate_status(query, current_user, is_registered=True), offset, size)
 
-    # Добавляем статусы
-    events_with_status = []
-    for event in events:
-        # Для зарегистрированных событий всегда is_registered = True
-        is_liked = await current_user.liked_events.filter(id=event.id).exists()
-
-        # Создаем BaseEvent из модели
-        base_event = BaseEvent.model_validate(event)
-        # Создаем EventWithUserStatus с добавленными статусами
-        event_with_status = EventWithUserStatus(
-            **base_event.model_dump(),
-            is_liked=is_liked,
-            is_registered=True  # Всегда true для зарегистрированных
-        )
-        events_with_status.append(event_with_status)
+    # Добавляем статусы (для зарегистрированных событий всегда is_registered = True)
+    events_with_status = _events_with_status(events, is_registered=True)
 
-    return {
-        "items": events_with_status,
-        "total": total,
-        "page": page,
-        "size": size,
-        "pages": (total + size - 1) // size  # ceil(total / size)
-    }
+    return _paginated_response(events_with_status, total, page, size)
 
 
 @router.get("/stats/my", response_model=dict)
 async def get_my_event_stats(current_user: User = Depends(get_current_user)):
     """Получить статистику пользователя по событиям"""
-    created_count = await Event.filter(organizer=current_user).count()
-    liked_count = await current_user.liked_events.all().count()
-    registered_count = await current_user.registered_events.all().count()
+    user_id = int(current_user.id)
+    likes = Event._meta.fields_map["liked_by"]
+    registrations = Event._meta.fields_map["participants"]
+
+    # Все три счетчика одним запросом
+    rows = await Event._meta.db.execute_query_dict(
+        f'SELECT '
+        f'(SELECT COUNT(*) FROM "{Event._meta.db_table}" WHERE "organizer_id" = {user_id}) AS "created_events", '
+        f'(SELECT COUNT(*) FROM "{likes.through}" WHERE "{likes.forward_key}" = {user_id}) AS "liked_events", '
+        f'(SELECT COUNT(*) FROM "{registrations.through}" '
+        f'WHERE "{registrations.forward_key}" = {user_id}) AS "registered_events"'
+    )
 
     return {
-        "created_events": created_count,
-        "liked_events": liked_count,
-        "registered_events": registered_count
+        "created_events": rows[0]["created_events"],
+        "liked_events": rows[0]["liked_events"],
+        "registered_events": rows[0]["registered_events"]
     }
 
 
@@ -1,10 +1,10 @@
 # app/api/locations/locations.py
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends
 from typing import Optional
 
 from db.models import Location, User
 from api.schemas import BaseLocation, LocationCreate
-from api.dependencies import get_current_user
+from api.dependencies import get_current_user, json_body, json_body_openapi
 from api.exceptions import NotFoundException
 from fastapi_pagination import Page
 from fastapi_pagination.ext.tortoise import paginate as tortoise_paginate
@@ -15,8 +15,6 @@ router = APIRouter(prefix="/locations", tags=["locations"])
 @router.get("/", response_model=Page[BaseLocation])
 async def get_locations(
         city: Optional[str] = None,
-        page: int = Query(1, ge=1),
-        size: int = Query(20, ge=1, le=100),
 ):
     """
     Получение списка локаций с возможностью фильтрации по городу.
@@ -49,10 +47,10 @@ async def get_location(location_id: int):
     return location
 
 
-@router.post("/", response_model=BaseLocation)
+@router.post("/", response_model=BaseLocation, openapi_extra=json_body_openapi(LocationCreate))
 async def create_location(
-        location_data: LocationCreate,
-        current_user: User = Depends(get_current_user)
+        current_user: User = Depends(get_current_user),
+        location_data: LocationCreate = Depends(json_body(LocationCreate))
 ):
     """
     Создание новой локации.
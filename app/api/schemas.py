@@ -1,18 +1,30 @@
 # app/api/schemas.py
-from pydantic import BaseModel, EmailStr, Field, field_validator, ConfigDict, constr
-from datetime import date, time, datetime
-from typing import List, Optional
+import re
+
+from pydantic import AfterValidator, BaseModel, EmailStr, Field, field_validator, ConfigDict, TypeAdapter
+from datetime import date, time, datetime, timedelta
+from time import time as _unix_time
+from typing import Annotated, List, Literal, Optional
 from fastapi_pagination import Page
 from datetime import date as date_type, time as time_type
 
+# Общие ограничения полей, переиспользуемые во всех схемах
+NameStr = Annotated[str, Field(min_length=1, max_length=100)]
+StreetStr = Annotated[str, Field(min_length=1, max_length=255)]
+HouseStr = Annotated[str, Field(min_length=1, max_length=50)]
+TitleStr = Annotated[str, Field(min_length=2, max_length=255)]
+CounterInt = Annotated[int, Field(ge=0)]
+PageSizeInt = Annotated[int, Field(ge=1, le=100)]
+
+
 # Base schemas
 class BaseUser(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
     id: int
     email: EmailStr
-    first_name: str = Field(..., min_length=1, max_length=100)
-    last_name: str = Field(..., min_length=1, max_length=100)
+    first_name: NameStr
+    last_name: NameStr
     created_at: datetime
     updated_at: datetime
 
@@ -21,23 +33,23 @@ class BaseCategory(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
     id: int
-    name: str = Field(..., min_length=1, max_length=100)
+    name: NameStr
 
 
 class BaseLocation(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
     id: int
-    city: str = Field(..., min_length=1, max_length=100)
-    street: str = Field(..., min_length=1, max_length=255)
-    house: str = Field(..., min_length=1, max_length=50)
+    city: NameStr
+    street: StreetStr
+    house: HouseStr
 
 
 class BaseEvent(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
     id: int
-    title: str = Field(..., min_length=2, max_length=255)
+    title: TitleStr
     short_description: str
     full_description: str
     date: date
@@ -45,8 +57,8 @@ class BaseEvent(BaseModel):
     location: BaseLocation
     categories: List[BaseCategory]
     organizer: BaseUser
-    likes_count: int = Field(ge=0, default=0)
-    participants_count: int = Field(ge=0, default=0)
+    likes_count: CounterInt = 0
+    participants_count: CounterInt = 0
     created_at: datetime
     updated_at: datetime
 
@@ -58,6 +70,10 @@ class EventWithUserStatus(BaseEvent):
     is_registered: bool = Field(default=False)
 
 
+# Адаптер для списка событий со статусами (схема валидации строится один раз)
+EVENT_WITH_STATUS_LIST_ADAPTER = TypeAdapter(List[EventWithUserStatus])
+
+
 class PaginatedEventsWithStatus(BaseModel):
     """Пагинированный ответ со статусами пользователя"""
     items: List[EventWithUserStatus]
@@ -69,28 +85,55 @@ class PaginatedEventsWithStatus(BaseModel):
 
 class UserWithStats(BaseUser):
     """Пользователь со статистикой по событиям"""
-    liked_events_count: int = Field(default=0, ge=0)
-    registered_events_count: int = Field(default=0, ge=0)
-    organized_events_count: int = Field(default=0, ge=0)
+    liked_events_count: CounterInt = 0
+    registered_events_count: CounterInt = 0
+    organized_events_count: CounterInt = 0
+
+
+# Текущая дата и момент (unix time), до которого она актуальна
+_today_value: date = date.min
+_today_expires_at: float = 0.0
+
+
+def today_cached() -> date:
+    """Текущая дата; пересчитывается только после наступления полуночи."""
+    global _today_value, _today_expires_at
+    if _unix_time() >= _today_expires_at:
+        _today_value = date.today()
+        _today_expires_at = datetime.combine(_today_value + timedelta(days=1), time.min).timestamp()
+    return _today_value
+
+
+# Пароль: не короче 8 символов, хотя бы одна цифра и одна буква (любого алфавита).
+# Быстрая проверка и диагностика используют одни и те же классы символов:
+# цифра - \d (десятичная цифра Unicode), буква - [^\W\d_]
+_PASSWORD_RE = re.compile(r'^(?=.*\d)(?=.*[^\W\d_]).{8,}$', re.DOTALL)
+_PASSWORD_DIGIT = re.compile(r'\d').search
+
+
+def _validate_password(v: str) -> str:
+    """Проверяет сложность пароля одним регулярным выражением."""
+    if _PASSWORD_RE.match(v):
+        return v
+
+    # Пароль не прошел проверку - определяем, какое правило нарушено
+    if len(v) < 8:
+        raise ValueError('Password must be at least 8 characters long')
+    if not _PASSWORD_DIGIT(v):
+        raise ValueError('Password must contain at least one digit')
+    raise ValueError('Password must contain at least one letter')
+
+
+# Пароль, проходящий проверку сложности
+StrongPassword = Annotated[str, Field(min_length=8), AfterValidator(_validate_password)]
 
 
 # Request schemas
 class UserRegister(BaseModel):
     email: EmailStr
-    first_name: str = Field(..., min_length=1, max_length=100)
-    last_name: str = Field(..., min_length=1, max_length=100)
-    password: str = Field(..., min_length=8)
-
-    @field_validator('password')
-    @classmethod
-    def validate_password(cls, v: str) -> str:
-        if len(v) < 8:
-            raise ValueError('Password must be at least 8 characters long')
-        if not any(c.isdigit() for c in v):
-            raise ValueError('Password must contain at least one digit')
-        if not any(c.isalpha() for c in v):
-            raise ValueError('Password must contain at least one letter')
-        return v
+    first_name: NameStr
+    last_name: NameStr
+    password: StrongPassword
 
 
 class UserLogin(BaseModel):
@@ -99,38 +142,27 @@ class UserLogin(BaseModel):
 
 
 class UserUpdate(BaseModel):
-    first_name: Optional[str] = Field(None, min_length=1, max_length=100)
-    last_name: Optional[str] = Field(None, min_length=1, max_length=100)
+    first_name: Optional[NameStr] = None
+    last_name: Optional[NameStr] = None
 
 
 class PasswordChange(BaseModel):
     old_password: str
-    new_password: str = Field(..., min_length=8)
-
-    @field_validator('new_password')
-    @classmethod
-    def validate_new_password(cls, v: str) -> str:
-        if len(v) < 8:
-            raise ValueError('Password must be at least 8 characters long')
-        if not any(c.isdigit() for c in v):
-            raise ValueError('Password must contain at least one digit')
-        if not any(c.isalpha() for c in v):
-            raise ValueError('Password must contain at least one letter')
-        return v
+    new_password: StrongPassword
 
 
 class CategoryCreate(BaseModel):
-    name: str = Field(..., min_length=1, max_length=100)
+    name: NameStr
 
 
 class LocationCreate(BaseModel):
-    city: str = Field(..., min_length=1, max_length=100)
-    street: str = Field(..., min_length=1, max_length=255)
-    house: str = Field(..., min_length=1, max_length=50)
+    city: NameStr
+    street: StreetStr
+    house: HouseStr
 
 
 class EventCreate(BaseModel):
-    title: str = Field(..., min_length=2, max_length=255)
+    title: TitleStr
     short_description: str
     full_description: str
     date: date
@@ -141,7 +173,7 @@ class EventCreate(BaseModel):
     @field_validator('date')
     @classmethod
     def validate_future_date(cls, v: date) -> date:
-        if v < date.today():
+        if v < today_cached():
             raise ValueError('Event date must be in the future')
         return v
 
@@ -149,7 +181,7 @@ class EventCreate(BaseModel):
 class EventUpdate(BaseModel):
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
-    title: Optional[str] = Field(None, min_length=2, max_length=255)
+    title: Optional[TitleStr] = None
     short_description: Optional[str] = None
     full_description: Optional[str] = None
     date: Optional[date_type] = None  # Используем date_type
@@ -160,7 +192,7 @@ class EventUpdate(BaseModel):
     @field_validator('date')
     @classmethod
     def validate_future_date(cls, v: Optional[date]) -> Optional[date]:
-        if v is not None and v < date.today():
+        if v is not None and v < today_cached():
             raise ValueError('Event date must be in the future')
         return v
 
@@ -193,15 +225,15 @@ class EventFilterParams(BaseModel):
     category_id: Optional[int] = None
     city: Optional[str] = None
     search: Optional[str] = None
-    sort_by_likes: Optional[constr(pattern="^(asc|desc)$")] = None
+    sort_by_likes: Optional[Literal["asc", "desc"]] = None
     page: int = 1
-    size: int = Field(ge=1, le=100, default=20)
+    size: PageSizeInt = 20
 
 
 class LocationFilterParams(BaseModel):
     city: Optional[str] = None
     page: int = 1
-    size: int = Field(ge=1, le=100, default=20)
+    size: PageSizeInt = 20
 
 
 # Pagination response
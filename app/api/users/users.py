@@ -1,6 +1,7 @@
 # app/api/users/users.py
-from fastapi import APIRouter, Depends
-from typing import Sequence
+import hmac
+
+from fastapi import APIRouter, Depends, Response
 from db.models import User, Event
 from api.schemas import (
     BaseUser,
@@ -8,56 +9,80 @@ from api.schemas import (
     PasswordChange,
     BaseEvent
 )
-from api.dependencies import get_current_user
+from api.dependencies import get_current_user, json_body, json_body_openapi
 from api.exceptions import BadRequestException
-from config import verify_password, get_password_hash
-from fastapi_pagination import Page, paginate
-from fastapi_pagination.ext.tortoise import paginate as tortoise_paginate
+from config import settings, averify_password, aget_password_hash
+from tortoise import timezone
 
 router = APIRouter(prefix="/users", tags=["users"])
 
 
+def _user_to_schema(user: User) -> BaseUser:
+    """
+    Преобразует пользователя из БД в BaseUser.
+
+    При TRUSTED_DB схема собирается без валидации,
+    иначе - через model_validate.
+    """
+    if settings.TRUSTED_DB:
+        return BaseUser.model_construct(
+            **{field: getattr(user, field) for field in BaseUser.model_fields}
+        )
+    return BaseUser.model_validate(user)
+
+
+def _user_response(user: User) -> Response:
+    """Отдает пользователя в JSON без повторной валидации по response_model."""
+    return Response(content=_user_to_schema(user).model_dump_json(), media_type="application/json")
+
+
 @router.get("/me", response_model=BaseUser)
 async def get_current_user_profile(current_user: User = Depends(get_current_user)):
-    return current_user
+    return _user_response(current_user)
 
 
-@router.put("/me", response_model=BaseUser)
+@router.put("/me", response_model=BaseUser, openapi_extra=json_body_openapi(UserUpdate))
 async def update_current_user_profile(
-        user_data: UserUpdate,
-        current_user: User = Depends(get_current_user)
+        current_user: User = Depends(get_current_user),
+        user_data: UserUpdate = Depends(json_body(UserUpdate))
 ):
-    update_data = user_data.model_dump(exclude_unset=True, exclude_none=True)
+    update_data = {
+        field: getattr(user_data, field)
+        for field in user_data.model_fields_set
+        if getattr(user_data, field) is not None
+    }
 
     if not update_data:
-        return current_user
+        return _user_response(current_user)
+
+    # Одним UPDATE без последующего refresh_from_db: updated_at задаем сами
+    update_data["updated_at"] = timezone.now()
+    await User.filter(id=current_user.id).update(**update_data)
 
     # Update user fields
     for field, value in update_data.items():
         setattr(current_user, field, value)
 
-    await current_user.save()
-
-    # Refresh to get updated timestamps
-    await current_user.refresh_from_db()
-    return current_user
+    return _user_response(current_user)
 
 
-@router.patch("/me/password", response_model=dict)
+@router.patch("/me/password", response_model=dict, openapi_extra=json_body_openapi(PasswordChange))
 async def change_password(
-        password_data: PasswordChange,
-        current_user: User = Depends(get_current_user)
+        current_user: User = Depends(get_current_user),
+        password_data: PasswordChange = Depends(json_body(PasswordChange))
 ):
     # Verify old password
-    if not verify_password(password_data.old_password, current_user.hashed_password):
+    if not await averify_password(password_data.old_password, current_user.hashed_password):
         raise BadRequestException("Incorrect old password")
 
     # Check if new password is same as old
-    if verify_password(password_data.new_password, current_user.hashed_password):
+    # Старый пароль уже проверен, поэтому достаточно сравнить открытые пароли
+    if hmac.compare_digest(password_data.old_password.encode(), password_data.new_password.encode()):
         raise BadRequestException("New password must be different from old password")
 
     # Update password
-    current_user.hashed_password = get_password_hash(password_data.new_password)
-    await current_user.save()
+    current_user.hashed_password = await aget_password_hash(password_data.new_password)
+    # Записываем только пароль, остальные поля профиля не перезаписываем
+    await current_user.save(update_fields=["hashed_password", "updated_at"])
 
     return {"message": "Password changed successfully"}
@@ -4,25 +4,31 @@
 Объединяет все настройки в одном месте.
 """
 
+import asyncio
+import time
+from functools import lru_cache
 from pathlib import Path
-from datetime import datetime, timedelta
-from typing import List, Optional, Dict, Any
-from jose import jwt
-from passlib.context import CryptContext
+from datetime import timedelta
+from typing import TYPE_CHECKING, Final, List, Optional, Dict, Any, Union
+import bcrypt
+import jwt
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+if TYPE_CHECKING:
+    from db.models import User
+
 # Константы
 ROOT_DIR = Path(__file__).parents[2]
 ENV_FILE_PATH = ROOT_DIR.joinpath('.env')
 
-# Контекст для хеширования паролей
-pwd_context = CryptContext(
-    schemes=["bcrypt"],
-    deprecated="auto",
-    bcrypt__rounds=12,
-    bcrypt__ident="2b"  # Явно указываем идентификатор
-)
+# Издатель и аудитория JWT токенов
+TOKEN_ISSUER = "event_manager_api"
+TOKEN_AUDIENCE = "event_manager_api_users"
+_TOKEN_STATIC_CLAIMS = {"iss": TOKEN_ISSUER, "aud": TOKEN_AUDIENCE}
+
+# bcrypt учитывает только первые 72 байта пароля
+BCRYPT_MAX_PASSWORD_BYTES = 72
 
 
 class Settings(BaseSettings):
@@ -48,6 +54,9 @@ class Settings(BaseSettings):
     ALGORITHM: str = Field(default="HS256")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = Field(default=1440)  # 24 hours
 
+    # Хеширование паролей (bcrypt, идентификатор 2b)
+    BCRYPT_ROUNDS: int = Field(default=12, ge=4, le=31)
+
     # CORS
     CORS_ORIGINS: List[str] = Field(default=["*"])
     CORS_ALLOW_CREDENTIALS: bool = Field(default=True)
@@ -61,10 +70,20 @@ class Settings(BaseSettings):
     # Server Settings
     RELOAD: bool = Field(default=True)
     WORKERS: int = Field(default=1)
+    # Создавать таблицы при старте (generate_schemas); по умолчанию схемой управляют миграции
+    AUTO_GENERATE_SCHEMAS: bool = Field(default=False)
+    # Сколько секунд /health считает успешную проверку БД актуальной
+    HEALTH_CACHE_SECONDS: float = Field(default=5, ge=0)
+
+    # Logging
+    LOG_LEVEL: str = Field(default="INFO")
 
     # Sentry
     USE_SENTRY: bool = Field(default=False)
 
+    # Данные из БД считаются доверенными (ответы собираются без повторной валидации)
+    TRUSTED_DB: bool = Field(default=True)
+
     # Test
     TEST_DB_URL: str = Field(default="sqlite://:memory:")
 
@@ -103,16 +122,48 @@ class Settings(BaseSettings):
 settings = Settings()
 tortoise_settings = settings.tortoise_config
 
+# Часто используемые настройки JWT как обычные константы модуля
+SECRET_KEY: Final[str] = settings.SECRET_KEY
+ALGORITHM: Final[str] = settings.ALGORITHM
+ACCESS_TOKEN_EXPIRE_SECONDS: Final[int] = settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+_ALGORITHMS: Final[List[str]] = [ALGORITHM]
+BCRYPT_ROUNDS: Final[int] = settings.BCRYPT_ROUNDS
+
+# Подпись, iss и aud проверяются в jwt.decode, exp - отдельно (см. decode_token)
+_JWT_DECODE_OPTIONS: Final[Dict[str, Any]] = {"verify_exp": False, "require": ["exp", "iat"]}
+
 
 # Функции безопасности (из security.py)
-def verify_password(plain_password: str, hashed_password: str) -> bool:
+def _password_bytes(password: str) -> bytes:
+    """Пароль в байтах; bcrypt учитывает только первые 72 байта."""
+    return password.encode("utf-8")[:BCRYPT_MAX_PASSWORD_BYTES]
+
+
+def verify_password(plain_password: str, hashed_password: Union[str, bytes]) -> bool:
     """Проверяет соответствие обычного пароля хешированному."""
-    return pwd_context.verify(plain_password, hashed_password)
+    if isinstance(hashed_password, str):
+        hashed_password = hashed_password.encode("utf-8")
+    try:
+        return bcrypt.checkpw(_password_bytes(plain_password), hashed_password)
+    except ValueError:
+        # Некорректный хеш
+        return False
 
 
 def get_password_hash(password: str) -> str:
     """Генерирует хеш пароля."""
-    return pwd_context.hash(password)
+    salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS, prefix=b"2b")
+    return bcrypt.hashpw(_password_bytes(password), salt).decode("ascii")
+
+
+async def averify_password(plain_password: str, hashed_password: str) -> bool:
+    """Проверяет пароль в отдельном потоке, не блокируя event loop."""
+    return await asyncio.to_thread(verify_password, plain_password, hashed_password)
+
+
+async def aget_password_hash(password: str) -> str:
+    """Генерирует хеш пароля в отдельном потоке, не блокируя event loop."""
+    return await asyncio.to_thread(get_password_hash, password)
 
 
 def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
@@ -120,92 +171,79 @@ def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta]
     if "sub" not in data:
         raise ValueError("Token data must contain 'sub' key")
 
-    to_encode = data.copy()
-
-    # Устанавливаем время истечения
+    # Время в секундах с начала эпохи, как и хранится в JWT
+    now = int(time.time())
     if expires_delta:
-        expire = datetime.utcnow() + expires_delta
+        expire = now + int(expires_delta.total_seconds())
     else:
-        expire = datetime.utcnow() + timedelta(
-            minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
-        )
+        expire = now + ACCESS_TOKEN_EXPIRE_SECONDS
 
     # Добавляем стандартные поля JWT
-    to_encode.update({
-        "exp": expire,
-        "iat": datetime.utcnow(),
-        "iss": "event_manager_api",
-        "aud": "event_manager_api_users"
-    })
+    to_encode = data | _TOKEN_STATIC_CLAIMS | {"exp": expire, "iat": now}
 
     # Кодируем токен
     encoded_jwt = jwt.encode(
         to_encode,
-        settings.SECRET_KEY,
-        algorithm=settings.ALGORITHM
+        SECRET_KEY,
+        algorithm=ALGORITHM
     )
 
     return encoded_jwt
 
 
-def create_user_access_token(user) -> str:
+def create_user_access_token(user: "User") -> str:
     """Создает токен доступа для пользователя."""
-    from db.models import User
+    email = getattr(user, "email", None)
+    if not email:
+        raise ValueError("User must have an email address")
 
-    if not isinstance(user, User):
-        raise TypeError(f"Expected User instance, got {type(user).__name__}")
+    return create_access_token({"sub": email})
 
-    if not hasattr(user, 'email') or not user.email:
-        raise ValueError("User must have an email address")
 
-    return create_access_token({"sub": user.email})
+@lru_cache(maxsize=4096)
+def _decode_token_cached(token: str) -> Dict[str, Any]:
+    """
+    Проверяет подпись и декодирует токен.
+
+    Результат кэшируется по строке токена; ошибки не кэшируются.
+    Срок действия проверяется отдельно в decode_token.
+    """
+    return jwt.decode(
+        token,
+        SECRET_KEY,
+        algorithms=_ALGORITHMS,
+        audience=TOKEN_AUDIENCE,
+        issuer=TOKEN_ISSUER,
+        options=_JWT_DECODE_OPTIONS
+    )
 
 
 def decode_token(token: str) -> Dict[str, Any]:
     """Декодирует JWT токен."""
     try:
-        payload = jwt.decode(
-            token,
-            settings.SECRET_KEY,
-            algorithms=[settings.ALGORITHM]
-        )
-        return payload
-    except jwt.ExpiredSignatureError:
-        raise jwt.JWTError("Token has expired")
-    except jwt.JWTError:
-        raise jwt.JWTError("Could not validate token")
+        payload = _decode_token_cached(token)
+    except jwt.PyJWTError:
+        raise jwt.InvalidTokenError("Could not validate token")
+
+    if time.time() >= payload["exp"]:
+        raise jwt.ExpiredSignatureError("Token has expired")
+
+    return dict(payload)
 
 
 def is_token_expired(token: str) -> bool:
-    """Проверяет, истек ли срок действия токена."""
+    """Проверяет, истек ли срок действия токена (невалидный токен считается истекшим)."""
     try:
-        payload = jwt.decode(
-            token,
-            settings.SECRET_KEY,
-            algorithms=[settings.ALGORITHM],
-            options={"verify_exp": False}
-        )
-        exp_timestamp = payload.get("exp")
-        if not exp_timestamp:
-            return True
-
-        exp_datetime = datetime.fromtimestamp(exp_timestamp)
-        return datetime.utcnow() > exp_datetime
-    except jwt.JWTError:
+        return time.time() >= _decode_token_cached(token)["exp"]
+    except jwt.PyJWTError:
         return True
 
 
 def get_email_from_token(token: str) -> Optional[str]:
-    """Извлекает email из токена без проверки подписи."""
+    """Извлекает email из токена с проверенной подписью (срок действия не проверяется)."""
     try:
-        payload = jwt.decode(
-            token,
-            settings.SECRET_KEY,
-            algorithms=[settings.ALGORITHM],
-            options={"verify_signature": False, "verify_exp": False}
-        )
-        return payload.get("sub")
-    except jwt.JWTError:
+        return _decode_token_cached(token).get("sub")
+    except jwt.PyJWTError:
         return None
 
 
@@ -218,6 +256,8 @@ __all__ = [
     'tortoise_settings',
     'verify_password',
     'get_password_hash',
+    'averify_password',
+    'aget_password_hash',
     'create_access_token',
     'create_user_access_token',
     'decode_token',
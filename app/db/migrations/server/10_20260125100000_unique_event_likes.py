@@ -0,0 +1,18 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DELETE FROM "user_event_likes" a USING "user_event_likes" b
+    WHERE a.ctid < b.ctid AND a."event_id" = b."event_id" AND a."user_id" = b."user_id";
+DROP INDEX IF EXISTS "idx_user_event_likes_event_user";
+CREATE UNIQUE INDEX IF NOT EXISTS "uidx_user_event_likes_event_user" ON "user_event_likes" ("event_id", "user_id");
+UPDATE "events" SET "likes_count" = (
+    SELECT COUNT(*) FROM "user_event_likes" WHERE "user_event_likes"."event_id" = "events"."id"
+);"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP INDEX IF EXISTS "uidx_user_event_likes_event_user";
+CREATE INDEX IF NOT EXISTS "idx_user_event_likes_event_user" ON "user_event_likes" ("event_id", "user_id");"""
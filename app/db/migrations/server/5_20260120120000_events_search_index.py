@@ -0,0 +1,13 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        CREATE INDEX IF NOT EXISTS "idx_events_search_tsv" ON "events" USING GIN (
+    to_tsvector('simple', "events"."title" || ' ' || "events"."short_description" || ' ' || "events"."full_description")
+);"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP INDEX IF EXISTS "idx_events_search_tsv";"""
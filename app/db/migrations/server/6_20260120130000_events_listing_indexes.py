@@ -0,0 +1,15 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        CREATE INDEX IF NOT EXISTS "idx_events_date_d93ec2" ON "events" ("date", "created_at");
+CREATE INDEX IF NOT EXISTS "idx_events_created_d652bf" ON "events" ("created_at");
+CREATE INDEX IF NOT EXISTS "idx_events_likes_c_9a16ca" ON "events" ("likes_count", "created_at");"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP INDEX IF EXISTS "idx_events_date_d93ec2";
+DROP INDEX IF EXISTS "idx_events_created_d652bf";
+DROP INDEX IF EXISTS "idx_events_likes_c_9a16ca";"""
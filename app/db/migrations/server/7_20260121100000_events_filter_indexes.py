@@ -0,0 +1,27 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        CREATE INDEX IF NOT EXISTS "idx_events_location" ON "events" ("location_id");
+CREATE INDEX IF NOT EXISTS "idx_events_organizer" ON "events" ("organizer_id");
+CREATE INDEX IF NOT EXISTS "idx_event_categories_cat_event" ON "event_categories" ("category_id", "events_id");
+CREATE INDEX IF NOT EXISTS "idx_event_categories_event" ON "event_categories" ("events_id");
+CREATE INDEX IF NOT EXISTS "idx_user_event_likes_event_user" ON "user_event_likes" ("event_id", "user_id");
+CREATE INDEX IF NOT EXISTS "idx_user_event_likes_user" ON "user_event_likes" ("user_id");
+CREATE INDEX IF NOT EXISTS "idx_user_event_reg_event_user" ON "user_event_registrations" ("event_id", "user_id");
+CREATE INDEX IF NOT EXISTS "idx_user_event_reg_user" ON "user_event_registrations" ("user_id");
+DROP INDEX IF EXISTS "idx_events_likes_c_87830d";"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP INDEX IF EXISTS "idx_events_location";
+DROP INDEX IF EXISTS "idx_events_organizer";
+DROP INDEX IF EXISTS "idx_event_categories_cat_event";
+DROP INDEX IF EXISTS "idx_event_categories_event";
+DROP INDEX IF EXISTS "idx_user_event_likes_event_user";
+DROP INDEX IF EXISTS "idx_user_event_likes_user";
+DROP INDEX IF EXISTS "idx_user_event_reg_event_user";
+DROP INDEX IF EXISTS "idx_user_event_reg_user";
+CREATE INDEX IF NOT EXISTS "idx_events_likes_c_87830d" ON "events" ("likes_count");"""
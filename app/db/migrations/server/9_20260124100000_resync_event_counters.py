@@ -0,0 +1,16 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        UPDATE "events" SET "likes_count" = (
+    SELECT COUNT(*) FROM "user_event_likes" WHERE "user_event_likes"."event_id" = "events"."id"
+);
+UPDATE "events" SET "participants_count" = (
+    SELECT COUNT(*) FROM "user_event_registrations" WHERE "user_event_registrations"."event_id" = "events"."id"
+);"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        SELECT 1;"""
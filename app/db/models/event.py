@@ -56,7 +56,9 @@ class Event(BaseModel):
         table = "events"
         indexes = [
             ("date", "time"),
-            ("likes_count",),
+            ("date", "created_at"),
+            ("created_at",),
+            ("likes_count", "created_at"),
             ("participants_count",),
         ]
 
@@ -0,0 +1,81 @@
+# app/db/relations.py
+"""
+Атомарные изменения связей пользователя с событием и счетчиков события.
+
+Запросы с RETURNING выполняются через execute_query_dict: клиент asyncpg
+отправляет UPDATE/DELETE из execute_query в connection.execute и
+возвращает пустой список строк, а execute_query_dict всегда читает
+результат запроса.
+"""
+
+from tortoise.backends.base.client import BaseDBAsyncClient
+from tortoise.expressions import RawSQL
+
+from db.models import Event
+
+
+def relation_columns(relation: str) -> tuple[str, str, str]:
+    """Возвращает таблицу связи M2M-поля Event и её колонки (событие, другая сторона)."""
+    field = Event._meta.fields_map[relation]
+    return field.through, field.backward_key, field.forward_key
+
+
+async def add_relation(relation: str, user_id: int, event_id: int, connection: BaseDBAsyncClient) -> bool:
+    """
+    Добавляет связь пользователя с событием одним INSERT, если её еще нет.
+
+    Повторную связь отсекает уникальный индекс таблицы (event, user)
+    через ON CONFLICT DO NOTHING, поэтому параллельные запросы не
+    создают дублей и не завершаются ошибкой IntegrityError.
+
+    Returns:
+        bool: True, если связь была добавлена
+    """
+    table, event_column, user_column = relation_columns(relation)
+    rows = await connection.execute_query_dict(
+        f'INSERT INTO "{table}" ("{event_column}", "{user_column}") '
+        f'VALUES ({int(event_id)}, {int(user_id)}) '
+        f'ON CONFLICT ("{event_column}", "{user_column}") DO NOTHING '
+        f'RETURNING "{event_column}"'
+    )
+    return bool(rows)
+
+
+async def remove_relation(relation: str, user_id: int, event_id: int, connection: BaseDBAsyncClient) -> bool:
+    """
+    Удаляет связь пользователя с событием одним DELETE.
+
+    Returns:
+        bool: True, если связь существовала и была удалена
+    """
+    table, event_column, user_column = relation_columns(relation)
+    deleted, _ = await connection.execute_query(
+        f'DELETE FROM "{table}" '
+        f'WHERE "{event_column}" = {int(event_id)} AND "{user_column}" = {int(user_id)}'
+    )
+    return deleted > 0
+
+
+def decrement(field: str) -> RawSQL:
+    """
+    Уменьшает счетчик на 1 на стороне БД, не опуская его ниже нуля.
+
+    Tortoise не поддерживает Case/When в update(), поэтому выражение
+    передается как RawSQL.
+    """
+    return RawSQL(f'CASE WHEN "{field}" > 0 THEN "{field}" - 1 ELSE 0 END')
+
+
+async def change_counter(event_id: int, field: str, increment: bool, connection: BaseDBAsyncClient) -> int:
+    """
+    Увеличивает или уменьшает счетчик события на 1 одним UPDATE.
+
+    Returns:
+        int: Новое значение счетчика
+    """
+    expression = f'"{field}" + 1' if increment else decrement(field).sql
+    rows = await connection.execute_query_dict(
+        f'UPDATE "{Event._meta.db_table}" SET "{field}" = {expression} '
+        f'WHERE "id" = {int(event_id)} RETURNING "{field}"'
+    )
+    return rows[0][field]
@@ -0,0 +1,77 @@
+# app/db/search.py
+"""
+Поиск событий по строке запроса.
+"""
+
+from enum import Enum
+
+from pypika import Table
+from pypika.enums import Comparator
+from pypika.terms import ArithmeticExpression, BasicCriterion, Criterion, Function, Term, ValueWrapper
+from tortoise.expressions import Q
+from tortoise.queryset import QuerySet
+
+from db.models import Event
+
+# Выражение, по которому построен GIN-индекс idx_events_search_tsv (см. миграцию 5)
+EVENT_SEARCH_TSV = (
+    "to_tsvector('simple', \"events\".\"title\" || ' ' || "
+    "\"events\".\"short_description\" || ' ' || \"events\".\"full_description\")"
+)
+
+
+class _TextSearch(Comparator):
+    match = "@@"
+
+
+class _TextOperator(Enum):
+    concat = "||"
+
+
+def _concat(*terms: Term) -> Term:
+    """Склеивает выражения через || (как в индексе, а не через CONCAT())."""
+    result = terms[0]
+    for term in terms[1:]:
+        result = ArithmeticExpression(_TextOperator.concat, result, term)
+    return result
+
+
+def event_search_criterion(search: str) -> Criterion:
+    """
+    Условие полнотекстового поиска PostgreSQL, совпадающее с EVENT_SEARCH_TSV.
+
+    Строка поиска передается в plainto_tsquery как значение pypika и
+    экранируется так же, как значения остальных фильтров ORM.
+    """
+    table = Table(Event._meta.db_table)
+    separator = ValueWrapper(" ")
+    document = _concat(
+        table.title, separator, table.short_description, separator, table.full_description
+    )
+    return BasicCriterion(
+        _TextSearch.match,
+        Function("to_tsvector", ValueWrapper("simple"), document),
+        Function("plainto_tsquery", ValueWrapper("simple"), ValueWrapper(search)),
+    )
+
+
+def apply_event_search(query: QuerySet[Event], search: str) -> QuerySet[Event]:
+    """
+    Фильтрует события по строке поиска.
+
+    На PostgreSQL используется полнотекстовый поиск по индексу: событие
+    находится, если содержит все слова запроса целиком (без поиска по
+    части слова). На остальных БД - icontains по заголовку и описаниям,
+    то есть поиск подстроки.
+    """
+    if Event._meta.db.capabilities.dialect == "postgres":
+        return query.annotate(search_match=event_search_criterion(search)).filter(search_match=True)
+
+    return query.filter(
+        Q(title__icontains=search) |
+        Q(short_description__icontains=search) |
+        Q(full_description__icontains=search)
+    )
+
+
+__all__ = ["EVENT_SEARCH_TSV", "apply_event_search", "event_search_criterion"]
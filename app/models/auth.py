@@ -3,7 +3,7 @@
 Pydantic модели для аутентификации и токенов.
 """
 
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Optional
 from pydantic import BaseModel, EmailStr
 
@@ -38,11 +38,21 @@ class LoginForm(BaseModel):
 class TokenPayload(BaseModel):
     """Полезная нагрузка JWT токена"""
     sub: str  # email пользователя
-    exp: datetime
-    iat: datetime
+    exp: Optional[int] = None  # Unix timestamp
+    iat: Optional[int] = None  # Unix timestamp
     iss: Optional[str] = None
     aud: Optional[str] = None
 
+    @property
+    def expires_at(self) -> Optional[datetime]:
+        """Время истечения токена (UTC)"""
+        return datetime.fromtimestamp(self.exp, timezone.utc) if self.exp is not None else None
+
+    @property
+    def issued_at(self) -> Optional[datetime]:
+        """Время выпуска токена (UTC)"""
+        return datetime.fromtimestamp(self.iat, timezone.utc) if self.iat is not None else None
+
 
 class AuthError(BaseModel):
     """Модель ошибки аутентификации"""
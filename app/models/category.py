@@ -24,9 +24,8 @@ class CategoryInDB(CategoryBase):
     model_config = ConfigDict(from_attributes=True)
 
 
-class CategoryResponse(CategoryInDB):
-    """Публичный ответ с данными категории"""
-    pass
+# Публичный ответ с данными категории совпадает со схемой из БД
+CategoryResponse = CategoryInDB
 
 
 class CategoryListResponse(BaseModel):
@@ -4,7 +4,7 @@ Pydantic модели для событий.
 """
 
 from datetime import date, time, datetime
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from pydantic import BaseModel, Field, field_validator, ConfigDict
 
 from .user import BaseUser
@@ -81,12 +81,11 @@ class EventInDB(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
-class EventResponse(EventInDB):
-    """Публичный ответ с данными события"""
-    pass
+# Публичный ответ с данными события совпадает со схемой из БД
+EventResponse = EventInDB
 
 
-class EventWithUserStatus(EventResponse):
+class EventWithUserStatus(EventInDB):
     """Событие со статусом пользователя (лайк/регистрация)"""
     is_liked: bool = Field(default=False)
     is_registered: bool = Field(default=False)
@@ -98,8 +97,11 @@ class EventFilterParams(BaseModel):
     city: Optional[str] = None
     search: Optional[str] = None
     sort_by_likes: Optional[str] = None
+    # Номер страницы учитывается только при сортировке по лайкам
     page: int = 1
     size: int = Field(ge=1, le=100, default=20)
+    # Курсор keyset-пагинации: (created_at, id) последнего события предыдущей страницы
+    cursor: Optional[Tuple[datetime, int]] = None
 
 
 class EventListResponse(BaseModel):
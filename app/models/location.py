@@ -26,9 +26,8 @@ class LocationInDB(LocationBase):
     model_config = ConfigDict(from_attributes=True)
 
 
-class LocationResponse(LocationInDB):
-    """Публичный ответ с данными локации"""
-    pass
+# Публичный ответ с данными локации совпадает со схемой из БД
+LocationResponse = LocationInDB
 
 
 class LocationFilterParams(BaseModel):
@@ -5,8 +5,11 @@ Pydantic модели для пользователей.
 """
 
 from datetime import datetime
-from typing import Optional, List
-from pydantic import BaseModel, EmailStr, Field, field_validator, ConfigDict
+from typing import Optional
+from pydantic import BaseModel, EmailStr, Field, ConfigDict
+
+# Проверка сложности пароля одна на весь проект (см. api.schemas)
+from api.schemas import StrongPassword
 
 
 class UserBase(BaseModel):
@@ -18,19 +21,7 @@ class UserBase(BaseModel):
 
 class UserCreate(UserBase):
     """Схема для создания пользователя (регистрация)"""
-    password: str = Field(..., min_length=8)
-
-    @field_validator('password')
-    @classmethod
-    def validate_password(cls, v: str) -> str:
-        """Валидация пароля"""
-        if len(v) < 8:
-            raise ValueError('Password must be at least 8 characters long')
-        if not any(c.isdigit() for c in v):
-            raise ValueError('Password must contain at least one digit')
-        if not any(c.isalpha() for c in v):
-            raise ValueError('Password must contain at least one letter')
-        return v
+    password: StrongPassword
 
 
 class UserUpdate(BaseModel):
@@ -46,15 +37,20 @@ class UserInDB(UserBase):
     created_at: datetime
     updated_at: datetime
 
-    model_config = ConfigDict(from_attributes=True)
+    # Готовые экземпляры (например, в UserListResponse.items) не перепроверяются и не копируются
+    model_config = ConfigDict(
+        from_attributes=True,
+        revalidate_instances='never',
+        validate_assignment=False,
+        extra='ignore',
+    )
 
 
-class UserResponse(UserInDB):
-    """Публичный ответ с данными пользователя"""
-    pass
+# Публичный ответ с данными пользователя совпадает со схемой из БД
+UserResponse = UserInDB
 
 
-class UserWithStats(UserResponse):
+class UserWithStats(UserInDB):
     """Пользователь со статистикой по событиям"""
     liked_events_count: Optional[int] = Field(default=0, ge=0)
     registered_events_count: Optional[int] = Field(default=0, ge=0)
@@ -64,19 +60,7 @@ class UserWithStats(UserResponse):
 class PasswordChange(BaseModel):
     """Схема для изменения пароля"""
     old_password: str
-    new_password: str = Field(..., min_length=8)
-
-    @field_validator('new_password')
-    @classmethod
-    def validate_new_password(cls, v: str) -> str:
-        """Валидация нового пароля"""
-        if len(v) < 8:
-            raise ValueError('Password must be at least 8 characters long')
-        if not any(c.isdigit() for c in v):
-            raise ValueError('Password must contain at least one digit')
-        if not any(c.isalpha() for c in v):
-            raise ValueError('Password must contain at least one letter')
-        return v
+    new_password: StrongPassword
 
 
 class LoginRequest(BaseModel):
@@ -87,12 +71,14 @@ class LoginRequest(BaseModel):
 
 class UserListResponse(BaseModel):
     """Список пользователей (для пагинации)"""
-    items: List[UserResponse]
+    items: list[UserResponse]
     total: int
     page: int
     size: int
     pages: int
 
+    model_config = ConfigDict(from_attributes=True, revalidate_instances='never')
+
 
 # Алиасы для обратной совместимости
 BaseUser = UserResponse  # Для совместимости с существующим кодом
@@ -3,6 +3,8 @@
 Основной файл FastAPI приложения.
 """
 
+import logging
+import time
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator
 from datetime import datetime
@@ -18,6 +20,11 @@ from config import settings, tortoise_settings
 # Импортируем роутеры
 from api import router as api_router
 
+logger = logging.getLogger(__name__)
+
+# Время последней успешной проверки БД в /health (по time.monotonic)
+_db_last_ok: float = float("-inf")
+
 
 def _init_middleware(_app: FastAPI) -> None:
     """
@@ -25,9 +32,11 @@ def _init_middleware(_app: FastAPI) -> None:
     """
     _app.add_middleware(
         CORSMiddleware,
-        allow_origins=settings.CORS_ORIGINS,
+        # Origin проверяется на каждом запросе, поэтому передаем множество
+        allow_origins=frozenset(settings.CORS_ORIGINS),
         allow_credentials=settings.CORS_ALLOW_CREDENTIALS,
-        allow_methods=settings.CORS_ALLOW_METHODS,
+        # Методы сравниваются с заголовком запроса как есть, поэтому приводим их к верхнему регистру
+        allow_methods=tuple(dict.fromkeys(method.upper() for method in settings.CORS_ALLOW_METHODS)),
         allow_headers=settings.CORS_ALLOW_HEADERS,
     )
 
@@ -76,15 +85,16 @@ async def _init_tortoise(testing: bool = False) -> None:
         # Инициализируем Tortoise
         await Tortoise.init(config=config)
 
-        # Создаем схемы (только при необходимости, например, в dev окружении)
-        if settings.is_development and not testing:
+        # Создаем схемы только по явному флагу: обычно схемой управляют миграции Aerich,
+        # а тесты создают таблицы один раз за сессию в своей фикстуре
+        if settings.AUTO_GENERATE_SCHEMAS and not testing:
             await Tortoise.generate_schemas(safe=True)
-            print("Database schemas generated")
+            logger.info("Database schemas generated")
 
-        print(f"Database initialized successfully (testing={testing})")
+        logger.info("Database initialized successfully (testing=%s)", testing)
 
     except Exception as e:
-        print(f"Failed to initialize database: {e}")
+        logger.error("Failed to initialize database: %s", e)
         raise
 
 
@@ -100,21 +110,21 @@ async def lifespan(_app: FastAPI) -> AsyncGenerator[None, None]:
         # Инициализация базы данных
         await _init_tortoise(testing=testing)
 
-        print("Application startup completed successfully")
+        logger.info("Application startup completed successfully")
         yield
 
     except Exception as e:
         # Логируем ошибку инициализации
-        print(f"Error during app initialization: {e}")
+        logger.error("Error during app initialization: %s", e)
         raise
 
     finally:
         # Гарантируем закрытие соединений при завершении
         try:
             await Tortoise.close_connections()
-            print("Database connections closed")
+            logger.info("Database connections closed")
         except Exception as e:
-            print(f"Error closing database connections: {e}")
+            logger.error("Error closing database connections: %s", e)
 
 
 def create_app(testing: bool = False) -> FastAPI:
@@ -127,6 +137,9 @@ def create_app(testing: bool = False) -> FastAPI:
     Returns:
         FastAPI: Настроенное приложение
     """
+    # Настройка логирования (не меняет уже настроенные обработчики, например uvicorn)
+    logging.basicConfig(level=settings.LOG_LEVEL.upper())
+
     # Инициализация Sentry (если включено)
     _init_sentry()
 
@@ -175,11 +188,16 @@ def create_app(testing: bool = False) -> FastAPI:
         Returns:
             dict: Статус здоровья приложения
         """
+        global _db_last_ok
+
         try:
-            # Проверяем соединение с БД
-            conn = Tortoise.get_connection("default")
-            # Выполняем простой запрос для проверки соединения
-            await conn.execute_query("SELECT 1")
+            # Недавняя успешная проверка переиспользуется, чтобы частые пробы не нагружали БД
+            if time.monotonic() - _db_last_ok >= settings.HEALTH_CACHE_SECONDS:
+                # Проверяем соединение с БД
+                conn = Tortoise.get_connection("default")
+                # Выполняем простой запрос для проверки соединения
+                await conn.execute_query("SELECT 1")
+                _db_last_ok = time.monotonic()
             db_status = "connected"
         except DBConnectionError:
             db_status = "disconnected"
@@ -4,27 +4,32 @@
 Содержит бизнес-логику для регистрации, входа и управления пользователями.
 """
 
-from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
-from jose import JWTError, jwt
-from passlib.context import CryptContext
-
-from db.models import User
-from models.user import UserCreate, TokenPayload, LoginRequest
-from models.auth import TokenResponse, AuthError
-from config import settings
+import hmac
+from datetime import timedelta
+from typing import Optional, Dict, Any, List
+
+import jwt
+from tortoise.expressions import RawSQL
+
+from db.models import Event, User
+from models.user import UserCreate, LoginRequest, UserWithStats
+from models.auth import TokenResponse, TokenPayload, AuthError
+from config import averify_password, aget_password_hash, create_access_token, decode_token
 from api.exceptions import AuthException, BadRequestException
 
+# Колонки пользователя, которые выбираются при входе и поиске по email
+_USER_FIELDS = ("id", "email", "hashed_password", "first_name", "last_name", "created_at", "updated_at")
+
+# Поля UserWithStats: колонки пользователя и аннотированные счетчики
+_USER_WITH_STATS_FIELDS = tuple(UserWithStats.model_fields)
+
 
 class AuthService:
     """Сервис аутентификации"""
 
-    def __init__(self):
-        self.pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-    def verify_password(self, plain_password: str, hashed_password: str) -> bool:
+    async def verify_password(self, plain_password: str, hashed_password: str) -> bool:
         """
-        Проверяет соответствие пароля его хешу.
+        Проверяет соответствие пароля его хешу (bcrypt выполняется в отдельном потоке).
 
         Args:
             plain_password: Обычный пароль
@@ -33,11 +38,11 @@ class AuthService:
         Returns:
             bool: True если пароль верный
         """
-        return self.pwd_context.verify(plain_password, hashed_password)
+        return await averify_password(plain_password, hashed_password)
 
-    def get_password_hash(self, password: str) -> str:
+    async def get_password_hash(self, password: str) -> str:
         """
-        Генерирует хеш пароля.
+        Генерирует хеш пароля (bcrypt выполняется в отдельном потоке).
 
         Args:
             password: Пароль для хеширования
@@ -45,11 +50,12 @@ class AuthService:
         Returns:
             str: Хешированный пароль
         """
-        return self.pwd_context.hash(password)
+        return await aget_password_hash(password)
 
     def create_access_token(self, data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
         """
-        Создает JWT токен.
+        Создает JWT токен через config.create_access_token
+        (те же iss/aud и время жизни, что у токенов API).
 
         Args:
             data: Данные для включения в токен
@@ -58,28 +64,7 @@ class AuthService:
         Returns:
             str: JWT токен
         """
-        to_encode = data.copy()
-
-        if expires_delta:
-            expire = datetime.utcnow() + expires_delta
-        else:
-            expire = datetime.utcnow() + timedelta(
-                minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
-            )
-
-        to_encode.update({
-            "exp": expire,
-            "iat": datetime.utcnow(),
-            "iss": getattr(settings, 'PROJECT_NAME', 'event_app'),
-            "aud": getattr(settings, 'API_V1_STR', '/api')
-        })
-
-        encoded_jwt = jwt.encode(
-            to_encode,
-            settings.SECRET_KEY,
-            algorithm=settings.ALGORITHM
-        )
-        return encoded_jwt
+        return create_access_token(data, expires_delta)
 
     def create_user_access_token(self, user: User) -> str:
         """
@@ -104,10 +89,10 @@ class AuthService:
         Returns:
             Optional[User]: Объект пользователя или None
         """
-        user = await User.get_or_none(email=email)
+        user = await User.filter(email=email).only(*_USER_FIELDS).first()
         if not user:
             return None
-        if not self.verify_password(password, user.hashed_password):
+        if not await self.verify_password(password, user.hashed_password):
             return None
         return user
 
@@ -125,12 +110,11 @@ class AuthService:
             BadRequestException: Если пользователь уже существует
         """
         # Проверяем, существует ли пользователь
-        existing_user = await User.get_or_none(email=user_data.email)
-        if existing_user:
+        if await User.filter(email=user_data.email).exists():
             raise BadRequestException("User with this email already exists")
 
         # Хешируем пароль
-        hashed_password = self.get_password_hash(user_data.password)
+        hashed_password = await self.get_password_hash(user_data.password)
 
         # Создаем пользователя
         user = await User.create(
@@ -155,16 +139,17 @@ class AuthService:
             BadRequestException: Если старый пароль неверен или новый пароль совпадает со старым
         """
         # Проверяем старый пароль
-        if not self.verify_password(old_password, user.hashed_password):
+        if not await self.verify_password(old_password, user.hashed_password):
             raise BadRequestException("Incorrect old password")
 
-        # Проверяем, что новый пароль отличается от старого
-        if self.verify_password(new_password, user.hashed_password):
+        # Проверяем, что новый пароль отличается от старого.
+        # Старый пароль уже проверен, поэтому второй вызов bcrypt не нужен
+        if hmac.compare_digest(old_password.encode(), new_password.encode()):
             raise BadRequestException("New password must be different from old password")
 
         # Хешируем новый пароль
-        user.hashed_password = self.get_password_hash(new_password)
-        await user.save()
+        user.hashed_password = await self.get_password_hash(new_password)
+        await user.save(update_fields=["hashed_password", "updated_at"])
 
     def decode_token(self, token: str) -> TokenPayload:
         """
@@ -180,30 +165,22 @@ class AuthService:
             AuthException: Если токен невалиден
         """
         try:
-            payload = jwt.decode(
-                token,
-                settings.SECRET_KEY,
-                algorithms=[settings.ALGORITHM]
-            )
-            email: str = payload.get("sub")
-            exp: int = payload.get("exp")
-            iat: int = payload.get("iat")
-            iss: str = payload.get("iss")
-            aud: str = payload.get("aud")
-
-            if email is None:
-                raise AuthException("Invalid token")
-
-            return TokenPayload(
-                sub=email,
-                exp=datetime.fromtimestamp(exp) if exp else None,
-                iat=datetime.fromtimestamp(iat) if iat else None,
-                iss=iss,
-                aud=aud
-            )
-        except JWTError as e:
+            payload = decode_token(token)
+        except jwt.PyJWTError as e:
             raise AuthException(f"Could not validate credentials: {str(e)}")
 
+        email: str = payload.get("sub")
+        if email is None:
+            raise AuthException("Invalid token")
+
+        return TokenPayload(
+            sub=email,
+            exp=payload.get("exp"),
+            iat=payload.get("iat"),
+            iss=payload.get("iss"),
+            aud=payload.get("aud")
+        )
+
     def create_token_response(self, user: User) -> TokenResponse:
         """
         Создает ответ с токеном и данными пользователя.
@@ -237,7 +214,44 @@ class AuthService:
         Returns:
             Optional[User]: Объект пользователя или None
         """
-        return await User.get_or_none(email=email)
+        return await User.filter(email=email).only(*_USER_FIELDS).first()
+
+    async def get_users_with_stats(self, offset: int = 0, limit: int = 100) -> List[UserWithStats]:
+        """
+        Получает пользователей со статистикой по событиям.
+
+        Счетчики считаются подзапросами в том же SELECT, поэтому
+        страница пользователей загружается одним запросом.
+
+        Args:
+            offset: Смещение
+            limit: Количество пользователей
+
+        Returns:
+            List[UserWithStats]: Пользователи со счетчиками
+        """
+        user_id = f'"{User._meta.db_table}"."id"'
+        likes = Event._meta.fields_map["liked_by"]
+        registrations = Event._meta.fields_map["participants"]
+
+        users = await User.all().order_by("id").offset(offset).limit(limit).annotate(
+            liked_events_count=RawSQL(
+                f'(SELECT COUNT(*) FROM "{likes.through}" WHERE "{likes.forward_key}" = {user_id})'
+            ),
+            registered_events_count=RawSQL(
+                f'(SELECT COUNT(*) FROM "{registrations.through}" '
+                f'WHERE "{registrations.forward_key}" = {user_id})'
+            ),
+            organized_events_count=RawSQL(
+                f'(SELECT COUNT(*) FROM "{Event._meta.db_table}" WHERE "organizer_id" = {user_id})'
+            ),
+        )
+
+        # Данные из БД доверенные, поэтому схемы собираются без валидации
+        return [
+            UserWithStats.model_construct(**{field: getattr(user, field) for field in _USER_WITH_STATS_FIELDS})
+            for user in users
+        ]
 
     async def update_user_profile(self, user: User, update_data: Dict[str, Any]) -> User:
         """
@@ -257,12 +271,13 @@ class AuthService:
             return user
 
         # Обновляем поля
-        for field, value in clean_data.items():
-            if hasattr(user, field):
-                setattr(user, field, value)
+        update_fields = [field for field in clean_data if field in user._meta.fields_map]
+        for field in update_fields:
+            setattr(user, field, clean_data[field])
 
-        await user.save()
-        await user.refresh_from_db()
+        # Пользователь может быть загружен через only(), поэтому сохраняем только измененные поля.
+        # updated_at (auto_now) проставляется в экземпляре при сохранении, перечитывать строку не нужно
+        await user.save(update_fields=[*update_fields, "updated_at"])
         return user
 
 
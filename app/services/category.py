@@ -5,11 +5,36 @@
 Сервис для работы с категориями.
 """
 
-from typing import List
+import asyncio
+from typing import Dict, List, Optional, Tuple
 from db.models import Category
 from models.category import CategoryCreate
 from api.exceptions import BadRequestException
 
+# Кэш категорий в памяти процесса: категории меняются редко, а читаются часто.
+# Заполняется при первом чтении списка и сбрасывается при любом изменении.
+_cache_all: Optional[Tuple[Category, ...]] = None
+_cache_by_id: Dict[int, Category] = {}
+_cache_lock = asyncio.Lock()
+
+
+def _invalidate_cache() -> None:
+    """Сбрасывает кэш категорий."""
+    global _cache_all, _cache_by_id
+    _cache_all = None
+    _cache_by_id = {}
+
+
+async def _load_cache() -> Tuple[Category, ...]:
+    """Возвращает отсортированный по имени снимок категорий, загружая его при необходимости."""
+    global _cache_all, _cache_by_id
+    async with _cache_lock:
+        if _cache_all is None:
+            categories = tuple(await Category.all().order_by("name"))
+            _cache_by_id = {category.id: category for category in categories}
+            _cache_all = categories
+        return _cache_all
+
 
 class CategoryService:
     """Сервис категорий"""
@@ -21,7 +46,7 @@ class CategoryService:
         Returns:
             List[Category]: Список всех категорий
         """
-        return await Category.all().order_by("name")
+        return list(_cache_all if _cache_all is not None else await _load_cache())
 
     async def get_category_by_id(self, category_id: int) -> Category:
         """
@@ -36,7 +61,12 @@ class CategoryService:
         Raises:
             NotFoundException: Если категория не найдена
         """
-        category = await Category.get_or_none(id=category_id)
+        if _cache_all is not None:
+            # Кэш содержит все категории, поэтому промах означает, что категории нет
+            category = _cache_by_id.get(category_id)
+        else:
+            # Схема ответа категории содержит только id и name
+            category = await Category.filter(id=category_id).only("id", "name").first()
         if not category:
             from api.exceptions import NotFoundException
             raise NotFoundException("Category not found")
@@ -56,12 +86,12 @@ class CategoryService:
             BadRequestException: Если категория с таким именем уже существует
         """
         # Проверяем, существует ли категория с таким именем
-        existing_category = await Category.get_or_none(name=category_data.name)
-        if existing_category:
+        if await Category.filter(name=category_data.name).exists():
             raise BadRequestException("Category with this name already exists")
 
         # Создаем категорию
         category = await Category.create(name=category_data.name)
+        _invalidate_cache()
         return category
 
     async def update_category(self, category_id: int, name: str) -> Category:
@@ -85,12 +115,13 @@ class CategoryService:
 
         # Проверяем, не занято ли имя другой категорией
         if name != category.name:
-            existing_category = await Category.get_or_none(name=name)
-            if existing_category:
+            if await Category.filter(name=name).exists():
                 raise BadRequestException("Category with this name already exists")
 
+        # Экземпляр может быть из кэша, поэтому кэш сбрасывается до изменения
+        _invalidate_cache()
         category.name = name
-        await category.save()
+        await category.save(update_fields=["name", "updated_at"])
         return category
 
     async def delete_category(self, category_id: int) -> None:
@@ -106,6 +137,7 @@ class CategoryService:
         from api.exceptions import NotFoundException
 
         category = await self.get_category_by_id(category_id)
+        _invalidate_cache()
         await category.delete()
 
 
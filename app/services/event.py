@@ -4,14 +4,36 @@
 Содержит бизнес-логику для создания, обновления и управления событиями.
 """
 
-from datetime import date, datetime
-from typing import List, Optional, Dict, Any
+import asyncio
+from datetime import datetime
+from typing import List, Optional, Dict, Any, Tuple
+from tortoise import BaseDBAsyncClient, timezone
 from tortoise.expressions import Q
 from tortoise.query_utils import Prefetch
+from tortoise.transactions import in_transaction
 
 from db.models import Event, Category, Location, User
+from db.relations import add_relation, change_counter, decrement, relation_columns, remove_relation
+from db.search import apply_event_search
 from models.event import EventCreate, EventUpdate, EventFilterParams
 from api.exceptions import NotFoundException, ForbiddenException, BadRequestException
+from api.schemas import today_cached
+
+
+def _categories_prefetch() -> Prefetch:
+    """Подгрузка категорий для списков: в ответе нужны только id и name."""
+    return Prefetch("categories", queryset=Category.all().only("id", "name"))
+
+
+async def _insert_event_categories(connection: BaseDBAsyncClient, event_id: int, categories: List[Category]) -> None:
+    """Добавляет связи события с категориями одним INSERT в таблицу связи."""
+    if not categories:
+        return
+    table, event_column, category_column = relation_columns("categories")
+    values = ", ".join(f"({int(event_id)}, {int(category.id)})" for category in categories)
+    await connection.execute_query(
+        f'INSERT INTO "{table}" ("{event_column}", "{category_column}") VALUES {values}'
+    )
 
 
 class EventService:
@@ -32,36 +54,40 @@ class EventService:
             NotFoundException: Если локация или категория не найдена
             BadRequestException: Если дата события в прошлом
         """
-        # Проверяем локацию
-        location = await Location.get_or_none(id=event_data.location_id)
+        # Локация и категории независимы, проверяем их параллельно
+        location, categories = await asyncio.gather(
+            Location.get_or_none(id=event_data.location_id),
+            # Для проверки и ответа достаточно id и name категорий
+            Category.filter(id__in=event_data.category_ids).only("id", "name"),
+        )
         if not location:
             raise NotFoundException("Location not found")
 
-        # Проверяем категории
-        categories = await Category.filter(id__in=event_data.category_ids).all()
         if len(categories) != len(event_data.category_ids):
             raise NotFoundException("One or more categories not found")
 
         # Проверяем дату (дополнительная проверка)
-        if event_data.date < date.today():
+        if event_data.date < today_cached():
             raise BadRequestException("Event date must be in the future")
 
-        # Создаем событие
-        event = await Event.create(
-            title=event_data.title,
-            short_description=event_data.short_description,
-            full_description=event_data.full_description,
-            date=event_data.date,
-            time=event_data.time,
-            location=location,
-            organizer=organizer,
-        )
+        # Событие и его категории создаются в одной транзакции
+        async with in_transaction() as connection:
+            event = await Event.create(
+                title=event_data.title,
+                short_description=event_data.short_description,
+                full_description=event_data.full_description,
+                date=event_data.date,
+                time=event_data.time,
+                location=location,
+                organizer=organizer,
+                using_db=connection,
+            )
 
-        # Добавляем категории
-        await event.categories.add(*categories)
+            # Добавляем категории; у нового события связей еще нет, проверять их не нужно
+            await _insert_event_categories(connection, event.id, categories)
 
-        # Загружаем связанные данные для ответа
-        await event.fetch_related("location", "organizer", "categories")
+        # Локация и организатор уже загружены, перечитываем только категории
+        await event.fetch_related("categories")
         return event
 
     async def get_event_by_id(self, event_id: int) -> Optional[Event]:
@@ -110,25 +136,32 @@ class EventService:
             location = await Location.get_or_none(id=clean_data["location_id"])
             if not location:
                 raise NotFoundException("Location not found")
+            # location_id остается в clean_data и записывается общим UPDATE
             event.location = location
-            del clean_data["location_id"]
 
         # Обрабатываем обновление категорий
         if "category_ids" in clean_data:
-            categories = await Category.filter(id__in=clean_data["category_ids"]).all()
+            categories = await Category.filter(id__in=clean_data["category_ids"]).only("id", "name")
             if len(categories) != len(clean_data["category_ids"]):
                 raise NotFoundException("One or more categories not found")
-            await event.categories.clear()
-            await event.categories.add(*categories)
+            # Заменяем связи в одной транзакции: DELETE старых и один INSERT новых
+            table, event_column, _ = relation_columns("categories")
+            async with in_transaction() as connection:
+                await connection.execute_query(
+                    f'DELETE FROM "{table}" WHERE "{event_column}" = {int(event.id)}'
+                )
+                await _insert_event_categories(connection, event.id, categories)
+            await event.fetch_related("categories")
             del clean_data["category_ids"]
 
-        # Обновляем остальные поля
-        for field, value in clean_data.items():
-            if hasattr(event, field):
+        # Обновляем остальные поля одним UPDATE только измененных колонок
+        clean_data = {field: value for field, value in clean_data.items() if field in Event._meta.db_fields}
+        if clean_data:
+            clean_data["updated_at"] = timezone.now()
+            await Event.filter(id=event.id).update(**clean_data)
+            for field, value in clean_data.items():
                 setattr(event, field, value)
 
-        await event.save()
-        await event.fetch_related("location", "organizer", "categories")
         return event
 
     async def delete_event(self, event_id: int, user: User) -> None:
@@ -153,17 +186,26 @@ class EventService:
 
         await event.delete()
 
-    async def get_events_with_filters(self, filters: EventFilterParams) -> List[Event]:
+    async def get_events_with_filters(
+            self, filters: EventFilterParams
+    ) -> Tuple[List[Event], Optional[Tuple[datetime, int]]]:
         """
-        Получает события с применением фильтров.
+        Получает страницу событий с применением фильтров.
+
+        При сортировке по дате создания используется keyset-пагинация
+        по (created_at, id): следующая страница запрашивается с курсором
+        из предыдущего ответа, а page не учитывается. При сортировке по
+        лайкам курсор не применяется, страница выбирается по page/size.
+        Размер страницы в обоих случаях - size.
 
         Args:
             filters: Параметры фильтрации
 
         Returns:
-            List[Event]: Список событий
+            Tuple[List[Event], Optional[Tuple[datetime, int]]]: События страницы
+            и курсор следующей страницы (None, если страница последняя)
         """
-        query = Event.all().select_related("location", "organizer").prefetch_related("categories")
+        query = Event.all().select_related("location", "organizer").prefetch_related(_categories_prefetch())
 
         # Фильтруем по категории
         if filters.category_id:
@@ -176,26 +218,36 @@ class EventService:
         # Поиск по ключевым словам
         if filters.search:
             search_term = filters.search.strip()
-            query = query.filter(
-                Q(title__icontains=search_term) |
-                Q(short_description__icontains=search_term) |
-                Q(full_description__icontains=search_term)
-            )
+            query = apply_event_search(query, search_term)
 
         # Фильтруем только будущие события
-        query = query.filter(date__gte=date.today())
+        query = query.filter(date__gte=today_cached())
+
+        limit = filters.size
 
         # Сортировка
-        if filters.sort_by_likes == "desc":
-            query = query.order_by("-likes_count", "-created_at")
-        elif filters.sort_by_likes == "asc":
-            query = query.order_by("likes_count", "-created_at")
-        else:
-            query = query.order_by("-created_at")
+        if filters.sort_by_likes in ("desc", "asc"):
+            likes_order = "-likes_count" if filters.sort_by_likes == "desc" else "likes_count"
+            query = query.order_by(likes_order, "-created_at", "-id")
+            events = await query.offset((filters.page - 1) * limit).limit(limit)
+            return events, None
+
+        if filters.cursor is not None:
+            created_at, event_id = filters.cursor
+            query = query.filter(
+                Q(created_at__lt=created_at) | (Q(created_at=created_at) & Q(id__lt=event_id))
+            )
+
+        # Берем на одно событие больше, чтобы узнать, есть ли следующая страница
+        events = await query.order_by("-created_at", "-id").limit(limit + 1)
+        if len(events) <= limit:
+            return events, None
 
-        return await query
+        events = events[:limit]
+        last = events[-1]
+        return events, (last.created_at, last.id)
 
-    async def toggle_like(self, event_id: int, user: User) -> Event:
+    async def toggle_like(self, event_id: int, user: User) -> Dict[str, int]:
         """
         Переключает лайк пользователя на событии.
 
@@ -204,32 +256,34 @@ class EventService:
             user: Пользователь
 
         Returns:
-            Event: Обновленное событие
+            Dict[str, int]: ID события и новое количество лайков
 
         Raises:
             NotFoundException: Если событие не найдено
         """
-        event = await self.get_event_by_id(event_id)
-        if not event:
+        # Само событие не нужно, достаточно убедиться, что оно существует
+        if not await Event.exists(id=event_id):
             raise NotFoundException("Event not found")
 
-        # Проверяем, лайкнул ли уже пользователь
-        liked = await user.liked_events.filter(id=event_id).exists()
-
-        if liked:
-            # Убираем лайк
-            await user.liked_events.remove(event)
-            event.likes_count = max(0, event.likes_count - 1)
-        else:
-            # Добавляем лайк
-            await user.liked_events.add(event)
-            event.likes_count += 1
-
-        await event.save()
-        await event.fetch_related("location", "organizer", "categories")
-        return event
-
-    async def register_for_event(self, event_id: int, user: User) -> Event:
+        async with in_transaction() as connection:
+            # Пробуем убрать лайк; если его не было - ставим.
+            # Отдельная проверка exists() не нужна
+            liked = not await remove_relation("liked_by", user.id, event_id, connection)
+            # Лайк, уже поставленный параллельным запросом, уникальный индекс не даст
+            # добавить повторно - тогда счетчик не меняется
+            changed = not liked or await add_relation("liked_by", user.id, event_id, connection)
+
+            # Счетчик меняется атомарно на стороне БД, новое значение возвращается тем же запросом
+            if changed:
+                likes_count = await change_counter(event_id, "likes_count", liked, connection)
+            else:
+                likes_count = await Event.filter(id=event_id).using_db(connection).first().values_list(
+                    "likes_count", flat=True
+                )
+
+        return {"event_id": int(event_id), "likes_count": likes_count}
+
+    async def register_for_event(self, event_id: int, user: User) -> Dict[str, int]:
         """
         Регистрирует пользователя на событие.
 
@@ -238,28 +292,26 @@ class EventService:
             user: Пользователь
 
         Returns:
-            Event: Обновленное событие
+            Dict[str, int]: ID события и новое количество участников
 
         Raises:
             NotFoundException: Если событие не найдено
             BadRequestException: Если пользователь уже зарегистрирован
         """
-        event = await self.get_event_by_id(event_id)
-        if not event:
+        # Само событие не нужно, достаточно убедиться, что оно существует
+        if not await Event.exists(id=event_id):
             raise NotFoundException("Event not found")
 
-        # Проверяем, не зарегистрирован ли уже
-        registered = await user.registered_events.filter(id=event_id).exists()
-        if registered:
-            raise BadRequestException("Already registered for this events")
+        async with in_transaction() as connection:
+            # Регистрация вставляется только если ее еще нет; результат INSERT
+            # заменяет отдельную проверку exists()
+            if not await add_relation("participants", user.id, event_id, connection):
+                raise BadRequestException("Already registered for this event")
 
-        # Регистрируем
-        await user.registered_events.add(event)
-        event.participants_count += 1
+            # Счетчик увеличивается атомарно, новое значение возвращается тем же запросом
+            participants_count = await change_counter(event_id, "participants_count", True, connection)
 
-        await event.save()
-        await event.fetch_related("location", "organizer", "categories")
-        return event
+        return {"event_id": int(event_id), "participants_count": participants_count}
 
     async def unregister_from_event(self, event_id: int, user: User) -> None:
         """
@@ -273,20 +325,17 @@ class EventService:
             NotFoundException: Если событие не найдено
             BadRequestException: Если пользователь не зарегистрирован
         """
-        event = await self.get_event_by_id(event_id)
-        if not event:
-            raise NotFoundException("Event not found")
-
-        # Проверяем, зарегистрирован ли
-        registered = await user.registered_events.filter(id=event_id).exists()
-        if not registered:
-            raise BadRequestException("Not registered for this events")
-
-        # Отменяем регистрацию
-        await user.registered_events.remove(event)
-        event.participants_count = max(0, event.participants_count - 1)
-
-        await event.save()
+        async with in_transaction() as connection:
+            # Удаляем регистрацию сразу; событие проверяется только если удалять было нечего
+            if not await remove_relation("participants", user.id, event_id, connection):
+                if not await Event.filter(id=event_id).using_db(connection).exists():
+                    raise NotFoundException("Event not found")
+                raise BadRequestException("Not registered for this event")
+
+            # Счетчик уменьшается атомарно и не опускается ниже нуля
+            await Event.filter(id=event_id).using_db(connection).update(
+                participants_count=decrement("participants_count")
+            )
 
     async def get_user_created_events(self, user: User) -> List[Event]:
         """
@@ -300,7 +349,7 @@ class EventService:
         """
         return await Event.filter(organizer=user).select_related(
             "location", "organizer"
-        ).prefetch_related("categories").order_by("-created_at").all()
+        ).prefetch_related(_categories_prefetch()).order_by("-created_at").all()
 
     async def get_user_liked_events(self, user: User) -> List[Event]:
         """
@@ -312,9 +361,10 @@ class EventService:
         Returns:
             List[Event]: Список лайкнутых событий
         """
-        return await Event.filter(liked_by__id=user.id).select_related(
+        # Запрос через обратную связь фильтрует по таблице связи без JOIN с users
+        return await user.liked_events.all().select_related(
             "location", "organizer"
-        ).prefetch_related("categories").order_by("-created_at").all()
+        ).prefetch_related(_categories_prefetch()).order_by("-created_at")
 
     async def get_user_registered_events(self, user: User) -> List[Event]:
         """
@@ -326,9 +376,10 @@ class EventService:
         Returns:
             List[Event]: Список зарегистрированных событий
         """
-        return await Event.filter(participants__id=user.id).select_related(
+        # Запрос через обратную связь фильтрует по таблице связи без JOIN с users
+        return await user.registered_events.all().select_related(
             "location", "organizer"
-        ).prefetch_related("categories").order_by("-created_at").all()
+        ).prefetch_related(_categories_prefetch()).order_by("-created_at")
 
 
 # Экземпляр сервиса для использования
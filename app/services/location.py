@@ -5,11 +5,21 @@
 
 from typing import List, Optional
 from tortoise.expressions import Q
+from tortoise.functions import Count
 
 from db.models import Location
 from models.location import LocationCreate, LocationUpdate
 from api.exceptions import NotFoundException, BadRequestException
 
+# Кэш списка городов в памяти процесса; сбрасывается при любом изменении локаций
+_cities_cache: Optional[List[str]] = None
+
+
+def _invalidate_cities_cache() -> None:
+    """Сбрасывает кэш списка городов."""
+    global _cities_cache
+    _cities_cache = None
+
 
 class LocationService:
     """Сервис локаций"""
@@ -105,6 +115,7 @@ class LocationService:
 
         # Создаем локацию
         location = await Location.create(**location_data.model_dump())
+        _invalidate_cities_cache()
         return location
 
     async def update_location(self, location_id: int, update_data: LocationUpdate) -> Location:
@@ -151,6 +162,7 @@ class LocationService:
                 setattr(location, field, value)
 
         await location.save()
+        _invalidate_cities_cache()
         return location
 
     async def delete_location(self, location_id: int) -> None:
@@ -165,6 +177,7 @@ class LocationService:
         """
         location = await self.get_location_by_id(location_id)
         await location.delete()
+        _invalidate_cities_cache()
 
     async def search_locations(self, search_query: str) -> List[Location]:
         """
@@ -196,8 +209,12 @@ class LocationService:
         Returns:
             List[str]: Список городов
         """
-        locations = await Location.all().distinct().order_by("city").values_list("city", flat=True)
-        return list(locations)
+        global _cities_cache
+        if _cities_cache is None:
+            _cities_cache = list(
+                await Location.all().distinct().order_by("city").values_list("city", flat=True)
+            )
+        return list(_cities_cache)
 
     async def get_locations_by_city(self, city: str) -> List[Location]:
         """
@@ -252,13 +269,16 @@ class LocationService:
         Returns:
             dict: Статистика
         """
-        total_locations = await Location.all().count()
-        cities = await self.get_cities()
-        locations_per_city = {}
-
-        for city in cities:
-            count = await Location.filter(city=city).count()
-            locations_per_city[city] = count
+        # Количество локаций по городам одним GROUP BY вместо запроса на каждый город
+        rows = await (
+            Location.annotate(locations_count=Count("id"))
+            .group_by("city")
+            .order_by("city")
+            .values_list("city", "locations_count")
+        )
+        locations_per_city = dict(rows)
+        cities = list(locations_per_city)
+        total_locations = sum(locations_per_city.values())
 
         return {
             "total_locations": total_locations,
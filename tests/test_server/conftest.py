@@ -1,12 +1,17 @@
 import pytest
 import pytest_asyncio
 import asyncio
+import hashlib
+import hmac
 from typing import AsyncGenerator
 
 from httpx import AsyncClient, ASGITransport
 from tortoise import Tortoise
+from tortoise.backends.sqlite.client import SqliteClient
 
+import config
 from app.server.server import create_app
+from db.models import User
 
 
 @pytest.fixture(scope="session")
@@ -21,11 +26,61 @@ def event_loop():
     loop.close()
 
 
+def _fast_password_hash(password: str) -> str:
+    """Тестовая замена bcrypt: sha256 вместо медленного KDF."""
+    return "sha256$" + hashlib.sha256(password.encode("utf-8")).hexdigest()
+
+
+def _fast_verify_password(plain_password: str, hashed_password) -> bool:
+    if isinstance(hashed_password, bytes):
+        hashed_password = hashed_password.decode("utf-8", "replace")
+    return hmac.compare_digest(_fast_password_hash(plain_password), hashed_password)
+
+
+# Настоящие функции хеширования, сохраненные до подмены
+_REAL_PASSWORD_FUNCTIONS = {
+    "get_password_hash": config.get_password_hash,
+    "verify_password": config.verify_password,
+}
+
+
+@pytest.fixture(scope="session", autouse=True)
+def fast_password_hashing():
+    """
+    Только для тестов: подменяет хеширование паролей на sha256.
+
+    Тесты проверяют коды ответов и содержимое JSON, а не стойкость хеша,
+    поэтому bcrypt на каждой регистрации и входе лишь замедляет прогон.
+    """
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(config, "get_password_hash", _fast_password_hash)
+        mp.setattr(config, "verify_password", _fast_verify_password)
+        yield
+
+
+@pytest.fixture
+def real_password_hashing(monkeypatch):
+    """Возвращает настоящий bcrypt на время теста (например, для проверки времени ответа)."""
+    for name, func in _REAL_PASSWORD_FUNCTIONS.items():
+        monkeypatch.setattr(config, name, func)
+
+
+# Уникальные индексы таблиц связей из миграций: generate_schemas их не создает
+_RELATION_UNIQUE_INDEXES = (
+    'CREATE UNIQUE INDEX IF NOT EXISTS "uidx_user_event_likes_event_user" '
+    'ON "user_event_likes" ("event_id", "user_id");',
+    'CREATE UNIQUE INDEX IF NOT EXISTS "uidx_user_event_reg_event_user" '
+    'ON "user_event_registrations" ("event_id", "user_id");',
+)
+
+
 @pytest_asyncio.fixture(scope="session", autouse=True)
 async def initialize_db():
     """Инициализация тестовой базы данных перед всеми тестами."""
-    # Используем SQLite в памяти для тестов
-    db_url = "sqlite://:memory:"
+    # Используем SQLite в памяти для тестов. Tortoise держит на sqlite одно
+    # соединение, поэтому shared cache не нужен. Параметры URL применяются
+    # как PRAGMA при подключении; журнал остается в памяти, чтобы работал ROLLBACK
+    db_url = "sqlite://:memory:?journal_mode=MEMORY&synchronous=OFF&temp_store=MEMORY"
 
     # Правильная конфигурация Tortoise - должна совпадать с моделями
     config = {
@@ -45,6 +100,7 @@ async def initialize_db():
 
     # Создание таблиц
     await Tortoise.generate_schemas()
+    await Tortoise.get_connection("default").execute_script("".join(_RELATION_UNIQUE_INDEXES))
 
     yield
 
@@ -59,19 +115,32 @@ async def clean_db():
     """
     yield  # Сначала выполняем тест
 
-    # Очищаем после теста
+    # Очищаем после теста одним скриптом вместо DELETE по каждой модели
+    models = Tortoise.apps.get("server", {}).values()
+    tables = {model._meta.db_table for model in models}
+    tables.update(
+        field.through
+        for model in models
+        for field in model._meta.fields_map.values()
+        if getattr(field, "through", None)
+    )
     try:
-        for model in Tortoise.apps.get("server", {}).values():
-            await model.all().delete()
+        await Tortoise.get_connection("default").execute_script(
+            "PRAGMA foreign_keys=OFF;"
+            + "".join(f'DELETE FROM "{table}";' for table in tables)
+            + "PRAGMA foreign_keys=ON;"
+        )
     except Exception:
         pass  # Игнорируем ошибки при очистке
 
 
-@pytest_asyncio.fixture(scope="function")
-async def async_client() -> AsyncGenerator[AsyncClient, None]:
-    """Фикстура для асинхронного тестового клиента."""
-    app = create_app(testing=True)
+# Приложение собирается один раз на все тесты
+app = create_app(testing=True)
 
+
+@pytest_asyncio.fixture(scope="session")
+async def async_client() -> AsyncGenerator[AsyncClient, None]:
+    """Фикстура для асинхронного тестового клиента (одна на сессию)."""
     # Используем ASGITransport для подключения к FastAPI приложению
     async with AsyncClient(
             transport=ASGITransport(app=app),
@@ -80,6 +149,42 @@ async def async_client() -> AsyncGenerator[AsyncClient, None]:
         yield client
 
 
+@pytest.fixture
+def asyncpg_execute_query(monkeypatch):
+    """
+    Эмулирует результат execute_query клиента asyncpg поверх sqlite.
+
+    asyncpg выполняет UPDATE/DELETE через connection.execute и возвращает
+    (число строк, []) даже при RETURNING, а для остальных запросов число
+    строк равно длине результата (INSERT без RETURNING дает 0).
+    """
+    original = SqliteClient.execute_query
+
+    async def execute_query(self, query, values=None):
+        rows_affected, rows = await original(self, query, values)
+        if query.startswith("UPDATE") or query.startswith("DELETE"):
+            return rows_affected, []
+        return len(rows), rows
+
+    monkeypatch.setattr(SqliteClient, "execute_query", execute_query)
+
+
+@pytest.fixture
+def user_factory():
+    """Фабрика пользователей: создает User в БД, недостающие поля заполняются значениями по умолчанию."""
+    async def make_user(**overrides) -> User:
+        fields = {
+            "email": "user@example.com",
+            "first_name": "Тест",
+            "last_name": "Пользователь",
+            "hashed_password": "hashed_password",
+            **overrides,
+        }
+        return await User.create(**fields)
+
+    return make_user
+
+
 @pytest_asyncio.fixture(scope="function")
 async def auth_token(async_client: AsyncClient):
     """Фикстура для получения токена аутентификации."""
@@ -0,0 +1,14 @@
+# tests/test_server/helpers.py
+from functools import lru_cache
+from typing import Any, Dict, List
+
+
+def unwrap_items(data: Any) -> List[Any]:
+    """Возвращает список элементов из ответа: страницы пагинации ({"items": ...}) или простого списка."""
+    return data["items"] if isinstance(data, dict) and "items" in data else data
+
+
+@lru_cache(maxsize=None)
+def auth_headers(token: str) -> Dict[str, str]:
+    """Заголовок авторизации для токена; собирается один раз на токен."""
+    return {"Authorization": f"Bearer {token}"}
@@ -1,38 +1,6 @@
 import pytest
-import pytest_asyncio
-from httpx import AsyncClient, ASGITransport
-from app.server.server import create_app
-from tortoise import Tortoise
-
-
-@pytest_asyncio.fixture(scope="function")
-async def async_client():
-    """Фикстура для асинхронного тестового клиента."""
-    app = create_app(testing=True)
-
-    # Инициализируем базу данных
-    db_url = "sqlite://:memory:"
-    config = {
-        "connections": {"default": db_url},
-        "apps": {
-            "server": {
-                "models": ["app.db.models"],
-                "default_connection": "default",
-            }
-        }
-    }
-
-    await Tortoise.init(config=config)
-    await Tortoise.generate_schemas()
-
-    async with AsyncClient(
-            transport=ASGITransport(app=app),
-            base_url="http://test"
-    ) as client:
-        yield client
-
-    # Очистка
-    await Tortoise.close_connections()
+from httpx import AsyncClient
+from tests.test_server.helpers import unwrap_items
 
 
 @pytest.mark.asyncio
@@ -72,10 +40,7 @@ async def test_get_all_locations_empty(async_client: AsyncClient):
     data = response.json()
 
     # Может быть список или пагинация
-    if isinstance(data, dict) and 'items' in data:
-        locations = data['items']
-    else:
-        locations = data
+    locations = unwrap_items(data)
 
     assert isinstance(locations, list)
     assert len(locations) == 0
\ No newline at end of file
@@ -1,7 +1,37 @@
 # tests/test_server/test_auth.py
 import pytest
+import pytest_asyncio
 from httpx import AsyncClient
 from db.models import User
+from config import create_user_access_token
+
+
+# Пользователь, общий для тестов входа, выхода и профиля
+REGISTERED_USER = {
+    "email": "login@example.com",
+    "first_name": "Петр",
+    "last_name": "Петров",
+    "password": "LoginPass123!",
+}
+
+
+@pytest_asyncio.fixture
+async def registered_user(async_client: AsyncClient):
+    """Регистрирует REGISTERED_USER и возвращает (ответ регистрации, email, пароль)."""
+    response = await async_client.post("/api/auth/register", json=REGISTERED_USER)
+    assert response.status_code == 200
+    return response.json(), REGISTERED_USER["email"], REGISTERED_USER["password"]
+
+
+@pytest_asyncio.fixture
+async def valid_token(user_factory):
+    """Пользователь, созданный напрямую в БД, и токен для него (без запроса к /register)."""
+    user = await user_factory(
+        email=REGISTERED_USER["email"],
+        first_name=REGISTERED_USER["first_name"],
+        last_name=REGISTERED_USER["last_name"],
+    )
+    return user, create_user_access_token(user)
 
 
 @pytest.mark.asyncio
@@ -38,21 +68,13 @@ class TestAuthAPI:
         assert "password" not in data
         assert "hashed_password" not in data
 
-        # Проверка, что пользователь создан в базе
-        user = await User.get_or_none(email="test@example.com")
-        assert user is not None
-        assert user.first_name == "Иван"
-        assert user.email == "test@example.com"
+        # Проверка, что пользователь создан в базе (поля уже проверены по ответу)
+        assert await User.filter(email="test@example.com").exists()
 
-    async def test_register_user_duplicate_email(self, async_client: AsyncClient):
+    async def test_register_user_duplicate_email(self, async_client: AsyncClient, user_factory):
         """Регистрация с уже существующим email"""
         # Создаем пользователя
-        await User.create(
-            email="existing@example.com",
-            first_name="Существующий",
-            last_name="Пользователь",
-            hashed_password="hashed_password"
-        )
+        await user_factory(email="existing@example.com")
 
         response = await async_client.post(
             "/api/auth/register",
@@ -69,6 +91,7 @@ class TestAuthAPI:
         assert "detail" in data
         assert "email" in data["detail"].lower() or "уже существует" in data["detail"].lower()
 
+    @pytest.mark.fast
     async def test_register_user_invalid_email(self, async_client: AsyncClient):
         """Регистрация с некорректным email"""
         response = await async_client.post(
@@ -85,6 +108,7 @@ class TestAuthAPI:
         data = response.json()
         assert "detail" in data
 
+    @pytest.mark.fast
     async def test_register_user_short_password(self, async_client: AsyncClient):
         """Регистрация с коротким паролем"""
         response = await async_client.post(
@@ -101,41 +125,22 @@ class TestAuthAPI:
         data = response.json()
         assert "detail" in data
 
-    async def test_register_user_missing_fields(self, async_client: AsyncClient):
+    @pytest.mark.fast
+    @pytest.mark.parametrize(
+        "payload",
+        [
+            # Без email
+            {"first_name": "Иван", "last_name": "Иванов", "password": "SecurePass123!"},
+            # Без пароля
+            {"email": "nopass@example.com", "first_name": "Иван", "last_name": "Иванов"},
+            # Без имени
+            {"email": "noname@example.com", "last_name": "Иванов", "password": "SecurePass123!"},
+        ],
+        ids=["no_email", "no_password", "no_first_name"],
+    )
+    async def test_register_user_missing_fields(self, async_client: AsyncClient, payload):
         """Регистрация с отсутствующими обязательными полями"""
-        # Без email
-        response = await async_client.post(
-            "/api/auth/register",
-            json={
-                "first_name": "Иван",
-                "last_name": "Иванов",
-                "password": "SecurePass123!",
-            },
-        )
-
-        assert response.status_code == 422
-
-        # Без пароля
-        response = await async_client.post(
-            "/api/auth/register",
-            json={
-                "email": "nopass@example.com",
-                "first_name": "Иван",
-                "last_name": "Иванов",
-            },
-        )
-
-        assert response.status_code == 422
-
-        # Без имени
-        response = await async_client.post(
-            "/api/auth/register",
-            json={
-                "email": "noname@example.com",
-                "last_name": "Иванов",
-                "password": "SecurePass123!",
-            },
-        )
+        response = await async_client.post("/api/auth/register", json=payload)
 
         assert response.status_code == 422
 
@@ -154,25 +159,30 @@ class TestAuthAPI:
         # Может быть 200 (если не требуется спецсимвол) или 422
         assert response.status_code in [200, 422]
 
-    async def test_login_success(self, async_client: AsyncClient):
-        """Успешный вход в систему"""
-        # Сначала регистрируем пользователя
-        register_response = await async_client.post(
+    async def test_register_user_password_non_decimal_digit(self, async_client: AsyncClient):
+        """Надстрочная цифра не считается цифрой пароля, ошибка указывает на цифру"""
+        response = await async_client.post(
             "/api/auth/register",
             json={
-                "email": "login@example.com",
-                "first_name": "Петр",
-                "last_name": "Петров",
-                "password": "LoginPass123!",
+                "email": "superscript@example.com",
+                "first_name": "Иван",
+                "last_name": "Иванов",
+                "password": "abcdefg²",
             },
         )
 
-        # Теперь входим
+        assert response.status_code == 422
+        assert "digit" in response.text
+
+    async def test_login_success(self, async_client: AsyncClient, registered_user):
+        """Успешный вход в систему"""
+        _, email, password = registered_user
+
         response = await async_client.post(
             "/api/auth/login",
             data={
-                "username": "login@example.com",
-                "password": "LoginPass123!",
+                "username": email,
+                "password": password,
             },
             headers={"Content-Type": "application/x-www-form-urlencoded"},
         )
@@ -241,66 +251,39 @@ class TestAuthAPI:
         data = response.json()
         assert "detail" in data
 
-    async def test_login_invalid_format(self, async_client: AsyncClient):
+    @pytest.mark.parametrize(
+        ("form", "expected_statuses"),
+        [
+            # Без username - может вернуть 401 (неверные учетные данные) или 422 (невалидная форма)
+            ({"password": "SomePass123!"}, [401, 422]),
+            # Без password - аналогично
+            ({"username": "test@example.com"}, [401, 422]),
+            # С пустым username - будет 401 (неверный email/пароль)
+            ({"username": "", "password": "SomePass123!"}, [401]),
+        ],
+        ids=["no_username", "no_password", "empty_username"],
+    )
+    async def test_login_invalid_format(self, async_client: AsyncClient, form, expected_statuses):
         """Вход с неправильным форматом данных"""
-        # Без username - может вернуть 401 (неверные учетные данные) или 422 (невалидная форма)
         response = await async_client.post(
             "/api/auth/login",
-            data={
-                "password": "SomePass123!",
-            },
+            data=form,
             headers={"Content-Type": "application/x-www-form-urlencoded"},
         )
 
-        print(f"Response without username - Status: {response.status_code}, Body: {response.text}")
         # OAuth2PasswordRequestForm может обрабатывать это как неверные учетные данные
-        assert response.status_code in [401, 422]
-
-        # Без password - аналогично
-        response = await async_client.post(
-            "/api/auth/login",
-            data={
-                "username": "test@example.com",
-            },
-            headers={"Content-Type": "application/x-www-form-urlencoded"},
-        )
-
-        print(f"Response without password - Status: {response.status_code}, Body: {response.text}")
-        assert response.status_code in [401, 422]
-
-        # С пустым username - будет 401 (неверный email/пароль)
-        response = await async_client.post(
-            "/api/auth/login",
-            data={
-                "username": "",
-                "password": "SomePass123!",
-            },
-            headers={"Content-Type": "application/x-www-form-urlencoded"},
-        )
+        assert response.status_code in expected_statuses, response.text
 
-        print(f"Response with empty username - Status: {response.status_code}, Body: {response.text}")
-        # Пустой username приведет к ошибке аутентификации
-        assert response.status_code == 401
-
-    async def test_login_case_insensitive_email(self, async_client: AsyncClient):
+    async def test_login_case_insensitive_email(self, async_client: AsyncClient, registered_user):
         """Проверка, что email нечувствителен к регистру"""
-        # Регистрируем с маленькими буквами
-        await async_client.post(
-            "/api/auth/register",
-            json={
-                "email": "case@example.com",
-                "first_name": "Регистр",
-                "last_name": "Тест",
-                "password": "CasePass123!",
-            },
-        )
+        _, email, password = registered_user
 
         # Пытаемся войти с большими буквами
         response = await async_client.post(
             "/api/auth/login",
             data={
-                "username": "CASE@EXAMPLE.COM",  # Большие буквы
-                "password": "CasePass123!",
+                "username": email.upper(),  # Большие буквы
+                "password": password,
             },
             headers={"Content-Type": "application/x-www-form-urlencoded"},
         )
@@ -308,20 +291,9 @@ class TestAuthAPI:
         # Может быть 200 или 401 в зависимости от реализации
         assert response.status_code in [200, 401]
 
-    async def test_logout_success(self, async_client: AsyncClient):
+    async def test_logout_success(self, async_client: AsyncClient, registered_user):
         """Успешный выход из системы"""
-        # Регистрируем и логинимся
-        register_response = await async_client.post(
-            "/api/auth/register",
-            json={
-                "email": "logout@example.com",
-                "first_name": "Владимир",
-                "last_name": "Владимиров",
-                "password": "LogoutPass123!",
-            },
-        )
-
-        auth_data = register_response.json()
+        auth_data, email, _ = registered_user
         token = auth_data["access_token"]
 
         # Выходим
@@ -354,14 +326,13 @@ class TestAuthAPI:
             assert profile_response.status_code == 401
         else:
             # По умолчанию для stateless JWT токен должен работать
-            print(f"Note: Token still works after logout (stateless JWT). Status: {profile_response.status_code}")
-            # Можно либо пропустить проверку, либо проверить что токен работает
-            assert profile_response.status_code == 200
+            assert profile_response.status_code == 200, profile_response.text
 
             # И проверяем, что возвращаются правильные данные
             profile_data = profile_response.json()
-            assert profile_data["email"] == "logout@example.com"
+            assert profile_data["email"] == email
 
+    @pytest.mark.fast
     async def test_logout_without_token(self, async_client: AsyncClient):
         """
         Выход без токена.
@@ -381,6 +352,7 @@ class TestAuthAPI:
         # Проверяем типичное сообщение
         assert "Not authenticated" in data["detail"] or "Forbidden" in data["detail"]
 
+    @pytest.mark.fast
     async def test_logout_invalid_token(self, async_client: AsyncClient):
         """Выход с невалидным токеном"""
         response = await async_client.post(
@@ -390,21 +362,9 @@ class TestAuthAPI:
 
         assert response.status_code == 401
 
-    async def test_token_returns_correct_user_data(self, async_client: AsyncClient):
+    async def test_token_returns_correct_user_data(self, async_client: AsyncClient, valid_token):
         """Проверка, что токен возвращает правильные данные пользователя"""
-        # Регистрируем пользователя
-        register_response = await async_client.post(
-            "/api/auth/register",
-            json={
-                "email": "tokenuser@example.com",
-                "first_name": "Токен",
-                "last_name": "Пользователь",
-                "password": "TokenPass123!",
-            },
-        )
-
-        auth_data = register_response.json()
-        token = auth_data["access_token"]
+        user, token = valid_token
 
         # Используем токен для получения профиля
         response = await async_client.get(
@@ -416,26 +376,14 @@ class TestAuthAPI:
         data = response.json()
 
         # Проверяем, что данные совпадают
-        assert data["email"] == "tokenuser@example.com"
-        assert data["first_name"] == "Токен"
-        assert data["last_name"] == "Пользователь"
-        assert data["id"] == auth_data["id"]
+        assert data["email"] == REGISTERED_USER["email"]
+        assert data["first_name"] == REGISTERED_USER["first_name"]
+        assert data["last_name"] == REGISTERED_USER["last_name"]
+        assert data["id"] == user.id
 
-    async def test_expired_token(self, async_client: AsyncClient):
+    async def test_expired_token(self, async_client: AsyncClient, valid_token):
         """Проверка работы с истекшим токеном"""
-        # Регистрируем пользователя
-        register_response = await async_client.post(
-            "/api/auth/register",
-            json={
-                "email": "expired@example.com",
-                "first_name": "Истекший",
-                "last_name": "Токен",
-                "password": "ExpiredPass123!",
-            },
-        )
-
-        auth_data = register_response.json()
-        token = auth_data["access_token"]
+        _, token = valid_token
 
         # Тест не может реально проверить истечение срока,
         # но проверяет что токен вообще работает
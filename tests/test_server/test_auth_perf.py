@@ -0,0 +1,67 @@
+# tests/test_server/test_auth_perf.py
+import time
+
+import pytest
+from httpx import AsyncClient
+
+
+# Бюджет на регистрацию и вход с настоящим bcrypt, секунды
+AUTH_LATENCY_BUDGET = 0.5
+ROUNDS = 5
+
+
+async def _mean_latency(request) -> float:
+    """Среднее время выполнения запроса за ROUNDS повторов."""
+    total = 0.0
+    for i in range(ROUNDS):
+        start = time.perf_counter()
+        response = await request(i)
+        total += time.perf_counter() - start
+        assert response.status_code == 200, response.text
+    return total / ROUNDS
+
+
+@pytest.mark.perf
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("real_password_hashing")
+class TestAuthPerf:
+    """Проверка, что регистрация и вход укладываются в бюджет времени"""
+
+    async def test_register_budget(self, async_client: AsyncClient):
+        """Регистрация с настоящим хешированием пароля"""
+        mean = await _mean_latency(
+            lambda i: async_client.post(
+                "/api/auth/register",
+                json={
+                    "email": f"perf{i}@example.com",
+                    "first_name": "Перф",
+                    "last_name": "Тест",
+                    "password": "PerfPass123!",
+                },
+            )
+        )
+
+        assert mean < AUTH_LATENCY_BUDGET
+
+    async def test_login_budget(self, async_client: AsyncClient):
+        """Вход с настоящей проверкой пароля"""
+        response = await async_client.post(
+            "/api/auth/register",
+            json={
+                "email": "perf_login@example.com",
+                "first_name": "Перф",
+                "last_name": "Тест",
+                "password": "PerfPass123!",
+            },
+        )
+        assert response.status_code == 200
+
+        mean = await _mean_latency(
+            lambda i: async_client.post(
+                "/api/auth/login",
+                data={"username": "perf_login@example.com", "password": "PerfPass123!"},
+                headers={"Content-Type": "application/x-www-form-urlencoded"},
+            )
+        )
+
+        assert mean < AUTH_LATENCY_BUDGET
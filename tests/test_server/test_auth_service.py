@@ -0,0 +1,40 @@
+# tests/test_server/test_auth_service.py
+from datetime import timedelta
+
+import jwt
+import pytest
+
+from api.exceptions import AuthException
+from config import TOKEN_AUDIENCE, TOKEN_ISSUER, decode_token, get_email_from_token, is_token_expired
+from services.auth import auth_service
+
+
+def test_service_token_is_accepted_by_api_and_service():
+    """Токен сервиса проверяется и общей функцией config, и самим сервисом"""
+    token = auth_service.create_access_token({"sub": "service@example.com"})
+
+    assert decode_token(token)["sub"] == "service@example.com"
+    assert auth_service.decode_token(token).sub == "service@example.com"
+
+
+def test_service_rejects_expired_token():
+    """Просроченный токен сервис отклоняет с AuthException"""
+    token = auth_service.create_access_token({"sub": "service@example.com"}, timedelta(seconds=-1))
+
+    with pytest.raises(AuthException):
+        auth_service.decode_token(token)
+
+
+def test_token_helpers_verify_signature():
+    """Токен с чужой подписью не дает email и считается истекшим"""
+    forged = jwt.encode(
+        {"sub": "admin@example.com", "exp": 4102444800, "iat": 0, "iss": TOKEN_ISSUER, "aud": TOKEN_AUDIENCE},
+        "another-secret-key-of-sufficient-length",
+        algorithm="HS256",
+    )
+    token = auth_service.create_access_token({"sub": "service@example.com"})
+
+    assert get_email_from_token(forged) is None
+    assert is_token_expired(forged)
+    assert get_email_from_token(token) == "service@example.com"
+    assert not is_token_expired(token)
@@ -2,25 +2,24 @@
 import pytest
 from httpx import AsyncClient
 from db.models import Category, User
+from config import create_user_access_token
 
 
 @pytest.mark.asyncio
 class TestCategoriesAPI:
     """Тесты для API категорий"""
 
-    async def _create_test_user(self, async_client: AsyncClient, email: str) -> str:
-        """Создание тестового пользователя и получение токена"""
-        response = await async_client.post(
-            "/api/auth/register",
-            json={
-                "email": email,
-                "first_name": "Тест",
-                "last_name": "Пользователь",
-                "password": "TestPass123!",
-            },
+    async def _create_test_user(self, email: str) -> str:
+        """Создание тестового пользователя и получение токена (без запроса к /register)"""
+        user = await User.create(
+            email=email,
+            first_name="Тест",
+            last_name="Пользователь",
+            hashed_password="hashed_password",
         )
-        return response.json()["access_token"]
+        return create_user_access_token(user)
 
+    @pytest.mark.fast
     async def test_get_all_categories_empty(self, async_client: AsyncClient):
         """Получение списка категорий (пустой)"""
         response = await async_client.get("/api/categories/")
@@ -34,9 +33,7 @@ class TestCategoriesAPI:
     async def test_get_all_categories_with_data(self, async_client: AsyncClient):
         """Получение списка категорий (с данными)"""
         # Создаем тестовые категории
-        await Category.create(name="Музыка")
-        await Category.create(name="Спорт")
-        await Category.create(name="Технологии")
+        await Category.bulk_create([Category(name=name) for name in ("Музыка", "Спорт", "Технологии")])
 
         response = await async_client.get("/api/categories/")
 
@@ -59,7 +56,7 @@ class TestCategoriesAPI:
 
     async def test_create_category_success(self, async_client: AsyncClient):
         """Успешное создание категории"""
-        token = await self._create_test_user(async_client, "category_creator@example.com")
+        token = await self._create_test_user("category_creator@example.com")
 
         response = await async_client.post(
             "/api/categories/",
@@ -81,7 +78,7 @@ class TestCategoriesAPI:
 
     async def test_create_category_duplicate_name(self, async_client: AsyncClient):
         """Создание категории с существующим именем"""
-        token = await self._create_test_user(async_client, "duplicate_cat@example.com")
+        token = await self._create_test_user("duplicate_cat@example.com")
 
         # Создаем первую категорию
         await async_client.post(
@@ -102,9 +99,10 @@ class TestCategoriesAPI:
         # Должно быть 400 или 409
         assert response.status_code in [400, 409]
 
+    @pytest.mark.fast
     async def test_create_category_empty_name(self, async_client: AsyncClient):
         """Создание категории с пустым названием"""
-        token = await self._create_test_user(async_client, "empty_cat@example.com")
+        token = await self._create_test_user("empty_cat@example.com")
 
         response = await async_client.post(
             "/api/categories/",
@@ -116,6 +114,7 @@ class TestCategoriesAPI:
 
         assert response.status_code == 422
 
+    @pytest.mark.fast
     async def test_create_category_unauthorized(self, async_client: AsyncClient):
         """Создание категории без авторизации"""
         response = await async_client.post(
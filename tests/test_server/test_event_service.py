@@ -0,0 +1,117 @@
+# tests/test_server/test_event_service.py
+from datetime import date, datetime, timedelta
+
+import pytest
+from tortoise.exceptions import IntegrityError
+
+from api.exceptions import BadRequestException
+from db.models import Event, Location, User
+from db.relations import add_relation, change_counter
+from models.event import EventFilterParams
+import services.event
+from services.event import event_service
+
+
+async def _create_user_and_event(email: str) -> tuple:
+    """Создание пользователя и его будущего события напрямую в БД: (user, event)"""
+    user = await User.create(
+        email=email,
+        first_name="Тест",
+        last_name="Пользователь",
+        hashed_password="hashed_password",
+    )
+    location = await Location.create(city="Москва", street="Тестовая улица", house="1")
+    event = await Event.create(
+        title="Событие сервиса",
+        short_description="Описание",
+        full_description="Полное описание",
+        date=date.today() + timedelta(days=7),
+        time=datetime.now().time(),
+        location=location,
+        organizer=user,
+    )
+    return user, event
+
+
+async def test_register_and_unregister_with_asyncpg_results(asyncpg_execute_query):
+    """Регистрация через сервис не зависит от строк, возвращаемых execute_query"""
+    user, event = await _create_user_and_event("service_register@example.com")
+
+    result = await event_service.register_for_event(event.id, user)
+    assert result == {"event_id": event.id, "participants_count": 1}
+
+    with pytest.raises(BadRequestException):
+        await event_service.register_for_event(event.id, user)
+
+    await event_service.unregister_from_event(event.id, user)
+    assert await Event.filter(id=event.id).values_list("participants_count", flat=True) == [0]
+
+
+async def test_toggle_like_with_asyncpg_results(asyncpg_execute_query):
+    """Переключение лайка через сервис не зависит от строк, возвращаемых execute_query"""
+    user, event = await _create_user_and_event("service_like@example.com")
+
+    assert await event_service.toggle_like(event.id, user) == {"event_id": event.id, "likes_count": 1}
+    assert await event.liked_by.filter(id=user.id).exists()
+
+    assert await event_service.toggle_like(event.id, user) == {"event_id": event.id, "likes_count": 0}
+    assert not await event.liked_by.filter(id=user.id).exists()
+
+
+async def test_duplicate_like_row_is_rejected():
+    """Таблица лайков, как и в миграциях, не допускает повторной связи пользователя с событием"""
+    user, event = await _create_user_and_event("duplicate_like@example.com")
+    await event.liked_by.add(user)
+
+    with pytest.raises(IntegrityError):
+        await Event._meta.db.execute_query(
+            f'INSERT INTO "user_event_likes" ("event_id", "user_id") VALUES ({event.id}, {user.id})'
+        )
+
+
+@pytest.mark.parametrize("relation", ["liked_by", "participants"])
+async def test_add_relation_skips_existing_row(relation):
+    """Повторная вставка связи (как у проигравшего гонку запроса) не падает, а возвращает False"""
+    user, event = await _create_user_and_event(f"conflict_{relation}@example.com")
+    connection = Event._meta.db
+
+    assert await add_relation(relation, user.id, event.id, connection)
+    assert not await add_relation(relation, user.id, event.id, connection)
+    assert await getattr(event, relation).all().count() == 1
+
+
+async def test_toggle_like_lost_race_does_not_count_twice(monkeypatch):
+    """Если лайк успел поставить параллельный запрос, счетчик не увеличивается второй раз"""
+    user, event = await _create_user_and_event("like_race@example.com")
+
+    async def add_after_concurrent_like(relation, user_id, event_id, connection):
+        # Параллельный запрос ставит лайк между DELETE и INSERT этого запроса
+        await add_relation(relation, user_id, event_id, connection)
+        await change_counter(event_id, "likes_count", True, connection)
+        return await add_relation(relation, user_id, event_id, connection)
+
+    monkeypatch.setattr(services.event, "add_relation", add_after_concurrent_like)
+
+    assert await event_service.toggle_like(event.id, user) == {"event_id": event.id, "likes_count": 1}
+    assert await event.liked_by.all().count() == 1
+
+
+@pytest.mark.parametrize("sort_by_likes", [None, "desc"])
+async def test_events_page_size_is_the_same_for_both_orderings(sort_by_likes):
+    """Размер страницы задает size и при keyset-пагинации, и при сортировке по лайкам"""
+    user, event = await _create_user_and_event("page_size@example.com")
+    for number in range(2):
+        await Event.create(
+            title=f"Событие {number}",
+            short_description="Описание",
+            full_description="Полное описание",
+            date=event.date,
+            time=event.time,
+            location_id=event.location_id,
+            organizer=user,
+        )
+
+    events, _ = await event_service.get_events_with_filters(
+        EventFilterParams(size=2, sort_by_likes=sort_by_likes)
+    )
+    assert len(events) == 2
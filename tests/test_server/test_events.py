@@ -1,28 +1,38 @@
 # tests/test_server/test_events.py
-import pytest
+import asyncio
 from httpx import AsyncClient
 from db.models import User, Event, Category, Location
+from config import create_user_access_token
+from tortoise import Tortoise
 from datetime import datetime, timedelta, date
+from typing import Optional
+from tests.test_server.helpers import auth_headers, unwrap_items
+from api.events import events as events_api
+from db.relations import add_relation, change_counter
 import json
 
 
-@pytest.mark.asyncio
+# Ответы на запрос без авторизации
+_AUTH_STATUSES = frozenset({401, 403})
+
+
 class TestEventsAPI:
     """Тесты для API событий"""
 
-    async def _create_test_user(self, async_client: AsyncClient, email: str) -> tuple:
-        """Создание тестового пользователя и получение токена"""
-        response = await async_client.post(
-            "/api/auth/register",
-            json={
-                "email": email,
-                "first_name": "Тест",
-                "last_name": "Пользователь",
-                "password": "TestPass123!",
-            },
+    async def _create_user(self, email: str, **fields) -> User:
+        """Создание пользователя напрямую в БД"""
+        return await User.create(
+            email=email,
+            first_name=fields.pop("first_name", "Тест"),
+            last_name=fields.pop("last_name", "Пользователь"),
+            hashed_password="hashed_password",
+            **fields,
         )
-        data = response.json()
-        return data["access_token"], data["id"]
+
+    async def _create_test_user(self, async_client: AsyncClient, email: str) -> tuple:
+        """Создание тестового пользователя напрямую в БД и выпуск токена (без /register): (token, user)"""
+        user = await self._create_user(email)
+        return create_user_access_token(user), user
 
     async def _create_test_category(self) -> Category:
         """Создание тестовой категории"""
@@ -38,20 +48,60 @@ class TestEventsAPI:
         )
         return location
 
+    async def _create_test_category_and_location(self) -> tuple:
+        """Создание тестовых категории и локации (запросы независимы, выполняются параллельно)"""
+        return await asyncio.gather(self._create_test_category(), self._create_test_location())
+
+    async def _create_user_and_event(self, email: str, title: str, organizer_email: Optional[str] = None) -> tuple:
+        """
+        Создание пользователя и события с тестовыми категорией и локацией.
+
+        Если передан organizer_email, событие принадлежит другому пользователю.
+        Возвращает (token, user, event).
+        """
+        user, category, location = await asyncio.gather(
+            self._create_user(email), self._create_test_category(), self._create_test_location()
+        )
+        organizer = user
+        if organizer_email is not None:
+            organizer = await self._create_user(organizer_email, first_name="Организатор", last_name="События")
+
+        event = await Event.create(
+            title=title,
+            short_description="Описание",
+            full_description="Полное описание",
+            date=date.today() + timedelta(days=7),
+            time=datetime.now().time(),
+            location=location,
+            organizer=organizer,
+        )
+        await event.categories.add(category)
+        return create_user_access_token(user), user, event
+
     # ==================== ОСНОВНЫЕ ТЕСТЫ СОБЫТИЙ ====================
 
     async def test_create_event_success(self, async_client: AsyncClient):
         """Успешное создание события"""
-        token, user_id = await self._create_test_user(async_client, "event_creator@example.com")
-        category = await self._create_test_category()
-        location = await self._create_test_location()
+        # Пользователь регистрируется через API, чтобы маршрут /register оставался покрыт
+        response = await async_client.post(
+            "/api/auth/register",
+            json={
+                "email": "event_creator@example.com",
+                "first_name": "Тест",
+                "last_name": "Пользователь",
+                "password": "TestPass123!",
+            },
+        )
+        auth_data = response.json()
+        token, user_id = auth_data["access_token"], auth_data["id"]
+        category, location = await self._create_test_category_and_location()
 
         future_date = (datetime.now() + timedelta(days=7)).date()
         future_time = (datetime.now() + timedelta(hours=1)).time()
 
         response = await async_client.post(
             "/api/events/",
-            headers={"Authorization": f"Bearer {token}"},
+            headers=auth_headers(token),
             json={
                 "title": "Тестовое событие",
                 "short_description": "Короткое описание",
@@ -82,6 +132,51 @@ class TestEventsAPI:
         assert "created_at" in data
         assert "updated_at" in data
 
+    async def test_update_event_location_and_categories(self, async_client: AsyncClient):
+        """Обновление локации и категорий события"""
+        token, user = await self._create_test_user(async_client, "event_updater@example.com")
+        category = await self._create_test_category()
+        new_category = await Category.create(name="Новая категория")
+        location = await self._create_test_location()
+        new_location = await Location.create(city="Казань", street="Новая улица", house="5")
+
+        event = await Event.create(
+            title="Событие для обновления",
+            short_description="Описание",
+            full_description="Полное описание",
+            date=date.today() + timedelta(days=7),
+            time=datetime.now().time(),
+            location=location,
+            organizer=user,
+        )
+        await event.categories.add(category)
+
+        response = await async_client.put(
+            f"/api/events/{event.id}",
+            headers=auth_headers(token),
+            json={
+                "title": "Обновленное событие",
+                "location_id": new_location.id,
+                "category_ids": [new_category.id],
+            },
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["title"] == "Обновленное событие"
+        assert data["location"]["id"] == new_location.id
+        assert [c["id"] for c in data["categories"]] == [new_category.id]
+
+        # Несуществующая категория - 404, событие не меняется
+        response = await async_client.put(
+            f"/api/events/{event.id}",
+            headers=auth_headers(token),
+            json={"category_ids": [999999]},
+        )
+        assert response.status_code == 404
+        await event.fetch_related("categories")
+        assert [c.id for c in event.categories] == [new_category.id]
+
     async def test_get_all_events_unauthorized(self, async_client: AsyncClient):
         """Получение списка событий без авторизации"""
         response = await async_client.get("/api/events/public")
@@ -92,15 +187,14 @@ class TestEventsAPI:
     async def test_get_all_events_with_status_requires_auth(self, async_client: AsyncClient):
         """Получение событий со статусами требует авторизации"""
         response = await async_client.get("/api/events/")
-        assert response.status_code in [401, 403]  # Требует авторизации
+        assert response.status_code in _AUTH_STATUSES  # Требует авторизации
 
     async def test_get_events_with_status_success(self, async_client: AsyncClient):
         """Успешное получение событий со статусами пользователя"""
-        token, user_id = await self._create_test_user(async_client, "status_viewer@example.com")
+        token, user = await self._create_test_user(async_client, "status_viewer@example.com")
 
         # Создаем тестовые данные
-        category = await self._create_test_category()
-        location = await self._create_test_location()
+        category, location = await self._create_test_category_and_location()
 
         # Создаем пользователя для организации
         organizer = await User.create(
@@ -125,12 +219,11 @@ class TestEventsAPI:
         await event1.categories.add(category)
 
         # Лайкаем одно событие
-        user = await User.get(id=user_id)
         await user.liked_events.add(event1)
 
         response = await async_client.get(
             "/api/events/",
-            headers={"Authorization": f"Bearer {token}"},
+            headers=auth_headers(token),
         )
 
         assert response.status_code == 200
@@ -153,29 +246,14 @@ class TestEventsAPI:
 
     async def test_get_event_with_status(self, async_client: AsyncClient):
         """Получение конкретного события со статусом пользователя"""
-        token, user_id = await self._create_test_user(async_client, "event_status@example.com")
-
-        category = await self._create_test_category()
-        location = await self._create_test_location()
-        user = await User.get(id=user_id)
-
-        event = await Event.create(
-            title="Событие со статусом",
-            short_description="Описание",
-            full_description="Полное описание",
-            date=date.today() + timedelta(days=7),
-            time=datetime.now().time(),
-            location=location,
-            organizer=user,
-        )
-        await event.categories.add(category)
+        token, user, event = await self._create_user_and_event("event_status@example.com", "Событие со статусом")
 
         # Лайкаем событие
         await user.liked_events.add(event)
 
         response = await async_client.get(
             f"/api/events/{event.id}",
-            headers={"Authorization": f"Bearer {token}"},
+            headers=auth_headers(token),
         )
 
         assert response.status_code == 200
@@ -191,7 +269,7 @@ class TestEventsAPI:
 
         response = await async_client.get(
             "/api/events/999999",
-            headers={"Authorization": f"Bearer {token}"},
+            headers=auth_headers(token),
         )
 
         assert response.status_code == 404
@@ -200,26 +278,12 @@ class TestEventsAPI:
 
     async def test_toggle_like(self, async_client: AsyncClient):
         """Переключение лайка"""
-        token, user_id = await self._create_test_user(async_client, "toggle_liker@example.com")
-        category = await self._create_test_category()
-        location = await self._create_test_location()
-        user = await User.get(id=user_id)
-
-        event = await Event.create(
-            title="Событие для лайка",
-            short_description="Описание",
-            full_description="Полное описание",
-            date=date.today() + timedelta(days=7),
-            time=datetime.now().time(),
-            location=location,
-            organizer=user,
-        )
-        await event.categories.add(category)
+        token, user, event = await self._create_user_and_event("toggle_liker@example.com", "Событие для лайка")
 
         # Первый раз - ставим лайк
         response1 = await async_client.post(
             f"/api/events/{event.id}/like",
-            headers={"Authorization": f"Bearer {token}"},
+            headers=auth_headers(token),
         )
         assert response1.status_code == 200
         data1 = response1.json()
@@ -228,14 +292,14 @@ class TestEventsAPI:
         # Проверяем статус
         status_response = await async_client.get(
             f"/api/events/{event.id}",
-            headers={"Authorization": f"Bearer {token}"},
+            headers=auth_headers(token),
         )
         assert status_response.json()["is_liked"] is True
 
         # Второй раз - убираем лайк
         response2 = await async_client.post(
             f"/api/events/{event.id}/like",
-            headers={"Authorization": f"Bearer {token}"},
+            headers=auth_headers(token),
         )
         assert response2.status_code == 200
         data2 = response2.json()
@@ -244,19 +308,17 @@ class TestEventsAPI:
         # Проверяем статус
         status_response2 = await async_client.get(
             f"/api/events/{event.id}",
-            headers={"Authorization": f"Bearer {token}"},
+            headers=auth_headers(token),
         )
         assert status_response2.json()["is_liked"] is False
 
-    async def test_register_and_unregister(self, async_client: AsyncClient):
-        """Регистрация и отмена регистрации"""
-        token, user_id = await self._create_test_user(async_client, "register_user@example.com")
-        category = await self._create_test_category()
+    async def test_toggle_like_counter_not_negative(self, async_client: AsyncClient):
+        """Снятие лайка не делает счетчик отрицательным"""
+        token, user = await self._create_test_user(async_client, "negative_liker@example.com")
         location = await self._create_test_location()
-        user = await User.get(id=user_id)
 
         event = await Event.create(
-            title="Событие для регистрации",
+            title="Событие с рассинхронизированным счетчиком",
             short_description="Описание",
             full_description="Полное описание",
             date=date.today() + timedelta(days=7),
@@ -264,12 +326,24 @@ class TestEventsAPI:
             location=location,
             organizer=user,
         )
-        await event.categories.add(category)
+        # Лайк есть, а счетчик остался нулевым
+        await event.liked_by.add(user)
+
+        response = await async_client.post(
+            f"/api/events/{event.id}/like",
+            headers=auth_headers(token),
+        )
+        assert response.status_code == 200
+        assert response.json()["likes_count"] == 0
+
+    async def test_register_and_unregister(self, async_client: AsyncClient):
+        """Регистрация и отмена регистрации"""
+        token, user, event = await self._create_user_and_event("register_user@example.com", "Событие для регистрации")
 
         # Регистрируемся
         response1 = await async_client.post(
             f"/api/events/{event.id}/register",
-            headers={"Authorization": f"Bearer {token}"},
+            headers=auth_headers(token),
         )
         assert response1.status_code == 200
         data1 = response1.json()
@@ -278,58 +352,84 @@ class TestEventsAPI:
         # Проверяем статус
         status_response = await async_client.get(
             f"/api/events/{event.id}",
-            headers={"Authorization": f"Bearer {token}"},
+            headers=auth_headers(token),
         )
         assert status_response.json()["is_registered"] is True
 
         # Пытаемся зарегистрироваться повторно
         response2 = await async_client.post(
             f"/api/events/{event.id}/register",
-            headers={"Authorization": f"Bearer {token}"},
+            headers=auth_headers(token),
         )
         assert response2.status_code == 400  # Already registered
 
         # Отменяем регистрацию
         response3 = await async_client.delete(
             f"/api/events/{event.id}/register",
-            headers={"Authorization": f"Bearer {token}"},
+            headers=auth_headers(token),
         )
         assert response3.status_code == 200
 
         # Проверяем статус
         status_response2 = await async_client.get(
             f"/api/events/{event.id}",
-            headers={"Authorization": f"Bearer {token}"},
+            headers=auth_headers(token),
         )
         assert status_response2.json()["is_registered"] is False
 
+    async def test_like_and_register_with_asyncpg_results(self, async_client: AsyncClient, asyncpg_execute_query):
+        """Лайк и регистрация не зависят от того, возвращает ли execute_query строки UPDATE ... RETURNING"""
+        token, user, event = await self._create_user_and_event("asyncpg_user@example.com", "Событие на PostgreSQL")
+        headers = auth_headers(token)
+
+        response = await async_client.post(f"/api/events/{event.id}/like", headers=headers)
+        assert response.status_code == 200
+        assert response.json()["likes_count"] == 1
+
+        response = await async_client.post(f"/api/events/{event.id}/like", headers=headers)
+        assert response.status_code == 200
+        assert response.json()["likes_count"] == 0
+
+        response = await async_client.post(f"/api/events/{event.id}/register", headers=headers)
+        assert response.status_code == 200
+        assert response.json()["participants_count"] == 1
+
+        response = await async_client.post(f"/api/events/{event.id}/register", headers=headers)
+        assert response.status_code == 400
+
+        response = await async_client.delete(f"/api/events/{event.id}/register", headers=headers)
+        assert response.status_code == 200
+        assert await Event.filter(id=event.id).values_list("participants_count", flat=True) == [0]
+
+    async def test_like_lost_race_does_not_count_twice(self, async_client: AsyncClient, monkeypatch):
+        """Если лайк успел поставить параллельный запрос, счетчик не увеличивается второй раз"""
+        token, user, event = await self._create_user_and_event("like_race_api@example.com", "Гонка лайков")
+
+        async def add_after_concurrent_like(relation, user_id, event_id, connection):
+            # Параллельный запрос ставит лайк между DELETE и INSERT этого запроса
+            await add_relation(relation, user_id, event_id, connection)
+            await change_counter(event_id, "likes_count", True, connection)
+            return await add_relation(relation, user_id, event_id, connection)
+
+        monkeypatch.setattr(events_api, "add_relation", add_after_concurrent_like)
+
+        response = await async_client.post(f"/api/events/{event.id}/like", headers=auth_headers(token))
+        assert response.status_code == 200
+        assert response.json()["likes_count"] == 1
+        assert await event.liked_by.all().count() == 1
+
     # ==================== ТЕСТЫ ПОЛЬЗОВАТЕЛЬСКИХ КОЛЛЕКЦИЙ ====================
 
     async def test_get_my_created_events_with_status(self, async_client: AsyncClient):
         """Получение созданных событий со статусами"""
-        token, user_id = await self._create_test_user(async_client, "created_status@example.com")
-        category = await self._create_test_category()
-        location = await self._create_test_location()
-        user = await User.get(id=user_id)
-
-        # Создаем событие
-        event = await Event.create(
-            title="Мое событие",
-            short_description="Описание",
-            full_description="Полное описание",
-            date=date.today() + timedelta(days=7),
-            time=datetime.now().time(),
-            location=location,
-            organizer=user,
-        )
-        await event.categories.add(category)
+        token, user, event = await self._create_user_and_event("created_status@example.com", "Мое событие")
 
         # Лайкаем свое событие
         await user.liked_events.add(event)
 
         response = await async_client.get(
             "/api/events/me/created",
-            headers={"Authorization": f"Bearer {token}"},
+            headers=auth_headers(token),
         )
 
         assert response.status_code == 200
@@ -345,37 +445,16 @@ class TestEventsAPI:
 
     async def test_get_my_liked_events_with_status(self, async_client: AsyncClient):
         """Получение лайкнутых событий со статусами"""
-        token, user_id = await self._create_test_user(async_client, "liked_status@example.com")
-        category = await self._create_test_category()
-        location = await self._create_test_location()
-        user = await User.get(id=user_id)
-
-        # Создаем другого организатора
-        organizer = await User.create(
-            email="other_org@example.com",
-            first_name="Другой",
-            last_name="Организатор",
-            hashed_password="hashed"
-        )
-
-        # Создаем событие
-        event = await Event.create(
-            title="Чужое событие",
-            short_description="Описание",
-            full_description="Полное описание",
-            date=date.today() + timedelta(days=7),
-            time=datetime.now().time(),
-            location=location,
-            organizer=organizer,
+        token, user, event = await self._create_user_and_event(
+            "liked_status@example.com", "Чужое событие", organizer_email="other_org@example.com"
         )
-        await event.categories.add(category)
 
         # Лайкаем событие
         await user.liked_events.add(event)
 
         response = await async_client.get(
             "/api/events/me/liked",
-            headers={"Authorization": f"Bearer {token}"},
+            headers=auth_headers(token),
         )
 
         assert response.status_code == 200
@@ -390,37 +469,16 @@ class TestEventsAPI:
 
     async def test_get_my_registered_events_with_status(self, async_client: AsyncClient):
         """Получение зарегистрированных событий со статусами"""
-        token, user_id = await self._create_test_user(async_client, "registered_status@example.com")
-        category = await self._create_test_category()
-        location = await self._create_test_location()
-        user = await User.get(id=user_id)
-
-        # Создаем другого организатора
-        organizer = await User.create(
-            email="event_org@example.com",
-            first_name="Организатор",
-            last_name="События",
-            hashed_password="hashed"
+        token, user, event = await self._create_user_and_event(
+            "registered_status@example.com", "Событие для регистрации", organizer_email="event_org@example.com"
         )
 
-        # Создаем событие
-        event = await Event.create(
-            title="Событие для регистрации",
-            short_description="Описание",
-            full_description="Полное описание",
-            date=date.today() + timedelta(days=7),
-            time=datetime.now().time(),
-            location=location,
-            organizer=organizer,
-        )
-        await event.categories.add(category)
-
         # Регистрируемся на событие
         await user.registered_events.add(event)
 
         response = await async_client.get(
             "/api/events/me/registered",
-            headers={"Authorization": f"Bearer {token}"},
+            headers=auth_headers(token),
         )
 
         assert response.status_code == 200
@@ -437,10 +495,11 @@ class TestEventsAPI:
 
     async def test_get_my_event_stats(self, async_client: AsyncClient):
         """Получение статистики пользователя"""
-        token, user_id = await self._create_test_user(async_client, "stats_user@example.com")
-        category = await self._create_test_category()
-        location = await self._create_test_location()
-        user = await User.get(id=user_id)
+        today = date.today()
+        now_time = datetime.now().time()
+
+        token, user = await self._create_test_user(async_client, "stats_user@example.com")
+        category, location = await self._create_test_category_and_location()
 
         # Создаем другого пользователя для организации
         other_user = await User.create(
@@ -455,8 +514,8 @@ class TestEventsAPI:
             title="Мое событие 1",
             short_description="Описание",
             full_description="Полное описание",
-            date=date.today() + timedelta(days=7),
-            time=datetime.now().time(),
+            date=today + timedelta(days=7),
+            time=now_time,
             location=location,
             organizer=user,
         )
@@ -466,8 +525,8 @@ class TestEventsAPI:
             title="Мое событие 2",
             short_description="Описание",
             full_description="Полное описание",
-            date=date.today() + timedelta(days=14),
-            time=datetime.now().time(),
+            date=today + timedelta(days=14),
+            time=now_time,
             location=location,
             organizer=user,
         )
@@ -477,8 +536,8 @@ class TestEventsAPI:
             title="Чужое событие",
             short_description="Описание",
             full_description="Полное описание",
-            date=date.today() + timedelta(days=21),
-            time=datetime.now().time(),
+            date=today + timedelta(days=21),
+            time=now_time,
             location=location,
             organizer=other_user,
         )
@@ -494,7 +553,7 @@ class TestEventsAPI:
 
         response = await async_client.get(
             "/api/events/stats/my",
-            headers={"Authorization": f"Bearer {token}"},
+            headers=auth_headers(token),
         )
 
         assert response.status_code == 200
@@ -512,18 +571,19 @@ class TestEventsAPI:
 
     async def test_filter_events_future_only(self, async_client: AsyncClient):
         """Фильтрация показывает только будущие события"""
-        token, user_id = await self._create_test_user(async_client, "future_filter@example.com")
-        category = await self._create_test_category()
-        location = await self._create_test_location()
-        user = await User.get(id=user_id)
+        today = date.today()
+        now_time = datetime.now().time()
+
+        token, user = await self._create_test_user(async_client, "future_filter@example.com")
+        category, location = await self._create_test_category_and_location()
 
         # Создаем события: одно в прошлом, одно сегодня, одно в будущем
         past_event = await Event.create(
             title="Прошедшее событие",
             short_description="Описание",
             full_description="Полное описание",
-            date=date.today() - timedelta(days=7),
-            time=datetime.now().time(),
+            date=today - timedelta(days=7),
+            time=now_time,
             location=location,
             organizer=user,
         )
@@ -533,8 +593,8 @@ class TestEventsAPI:
             title="Будущее событие",
             short_description="Описание",
             full_description="Полное описание",
-            date=date.today() + timedelta(days=7),
-            time=datetime.now().time(),
+            date=today + timedelta(days=7),
+            time=now_time,
             location=location,
             organizer=user,
         )
@@ -542,21 +602,18 @@ class TestEventsAPI:
 
         response = await async_client.get(
             "/api/events/",
-            headers={"Authorization": f"Bearer {token}"},
+            headers=auth_headers(token),
         )
 
         assert response.status_code == 200
         data = response.json()
 
-        if isinstance(data, dict) and 'items' in data:
-            events = data['items']
-        else:
-            events = data
+        events = unwrap_items(data)
 
         # Должны быть только будущие события
         for event in events:
-            event_date = datetime.fromisoformat(event["date"].replace('Z', '+00:00')).date()
-            assert event_date >= date.today()
+            event_date = date.fromisoformat(event["date"][:10])
+            assert event_date >= today
 
     # ==================== ИСПРАВЛЕНИЯ СТАРЫХ ТЕСТОВ ====================
 
@@ -630,6 +687,9 @@ class TestEventsAPI:
     # Дополним тест на фильтрацию, чтобы он использовал правильный endpoint
     async def test_filter_events_by_category(self, async_client: AsyncClient):
         """Фильтрация событий по категории"""
+        today = date.today()
+        now_time = datetime.now().time()
+
         # Создаем тестовые данные
         user = await User.create(
             email="filter_user@example.com",
@@ -648,8 +708,8 @@ class TestEventsAPI:
             title="Концерт",
             short_description="Музыкальный концерт",
             full_description="Концерт",
-            date=date.today() + timedelta(days=7),
-            time=datetime.now().time(),
+            date=today + timedelta(days=7),
+            time=now_time,
             location=location,
             organizer=user,
             likes_count=5,
@@ -661,8 +721,8 @@ class TestEventsAPI:
             title="Марафон",
             short_description="Спортивный марафон",
             full_description="Марафон",
-            date=date.today() + timedelta(days=14),
-            time=datetime.now().time(),
+            date=today + timedelta(days=14),
+            time=now_time,
             location=location,
             organizer=user,
             likes_count=3,
@@ -685,6 +745,9 @@ class TestEventsAPI:
 
     async def test_pagination(self, async_client: AsyncClient):
         """Проверка пагинации"""
+        today = date.today()
+        now_time = datetime.now().time()
+
         # Создаем тестовые данные
         user = await User.create(
             email="pagination_creator@example.com",
@@ -696,44 +759,54 @@ class TestEventsAPI:
         category = await Category.create(name="Тест")
         location = await Location.create(city="Москва", street="Улица", house="1")
 
-        # Создаем только будущие события
-        for i in range(15):
-            event = await Event.create(
+        # Создаем только будущие события одним INSERT
+        await Event.bulk_create([
+            Event(
                 title=f"Событие {i}",
                 short_description=f"Описание {i}",
                 full_description=f"Полное описание {i}",
-                date=date.today() + timedelta(days=i + 1),  # Все в будущем
-                time=datetime.now().time(),
+                date=today + timedelta(days=i + 1),  # Все в будущем
+                time=now_time,
                 location=location,
                 organizer=user,
                 likes_count=i,
                 participants_count=i * 2
             )
-            await event.categories.add(category)
+            for i in range(15)
+        ])
+
+        # Связи с категорией - тоже одним INSERT
+        event_ids = await Event.filter(organizer=user).values_list("id", flat=True)
+        field = Event._meta.fields_map["categories"]
+        rows = ", ".join(f"({event_id}, {category.id})" for event_id in event_ids)
+        await Tortoise.get_connection("default").execute_query(
+            f'INSERT INTO "{field.through}" ("{field.backward_key}", "{field.forward_key}") VALUES {rows}'
+        )
 
-        # Первая страница (без авторизации)
-        response = await async_client.get("/api/events/public?page=1&size=5")
+        # Все события одной страницей (без авторизации), "страницы" режем локально
+        response = await async_client.get("/api/events/public?page=1&size=15")
 
         assert response.status_code == 200
         data = response.json()
 
         assert isinstance(data, dict)
         assert 'items' in data
-        assert len(data['items']) == 5
+        items = data['items']
+        assert len(items) == 15
         assert data['page'] == 1
-        assert data['size'] == 5
+        assert data['size'] == 15
         assert data['total'] >= 15
-        assert data['pages'] >= 3
 
-        # Проверяем вторую страницу
+        page1_ids = {item["id"] for item in items[:5]}
+        page2_ids = {item["id"] for item in items[5:10]}
+        assert page1_ids.isdisjoint(page2_ids), "Pages should have different events"
+
+        # Арифметика пагинации проверяется одним дополнительным запросом
         response_page2 = await async_client.get("/api/events/public?page=2&size=5")
         assert response_page2.status_code == 200
         data_page2 = response_page2.json()
 
         assert len(data_page2['items']) == 5
         assert data_page2['page'] == 2
-
-        # Проверяем, что события на разных страницах разные
-        page1_ids = {item["id"] for item in data['items']}
-        page2_ids = {item["id"] for item in data_page2['items']}
-        assert page1_ids.isdisjoint(page2_ids), "Pages should have different events"
\ No newline at end of file
+        assert data_page2['pages'] >= 3
+        assert {item["id"] for item in data_page2['items']} <= {item["id"] for item in items}
\ No newline at end of file
@@ -0,0 +1,55 @@
+# tests/test_server/test_search.py
+from datetime import date, datetime, timedelta
+
+from httpx import AsyncClient
+
+from db.models import Event, Location, User
+from db.search import event_search_criterion
+from tests.test_server.helpers import unwrap_items
+
+
+def test_search_criterion_matches_index_expression():
+    """Условие поиска PostgreSQL строится по выражению индекса, а строка поиска передается одним значением"""
+    sql = event_search_criterion("концерт").get_sql(quote_char='"', with_namespace=True)
+
+    assert sql == (
+        "to_tsvector('simple',\"events\".\"title\"||' '||\"events\".\"short_description\"||' '||"
+        "\"events\".\"full_description\")@@plainto_tsquery('simple','концерт')"
+    )
+
+
+def test_search_criterion_quotes_value():
+    """Кавычки в строке поиска не завершают строковый литерал"""
+    sql = event_search_criterion("x'); DROP TABLE events; --").get_sql(quote_char='"', with_namespace=True)
+
+    assert sql.endswith("plainto_tsquery('simple','x''); DROP TABLE events; --')")
+
+
+async def test_public_events_search_matches_substring(async_client: AsyncClient):
+    """На sqlite поиск находит подстроку в заголовке и описаниях"""
+    user = await User.create(
+        email="search_owner@example.com",
+        first_name="Тест",
+        last_name="Пользователь",
+        hashed_password="hashed_password",
+    )
+    location = await Location.create(city="Москва", street="Улица", house="1")
+    event_date = date.today() + timedelta(days=3)
+    event_time = datetime.now().time()
+    await Event.bulk_create([
+        Event(
+            title=title,
+            short_description="Описание",
+            full_description="Полное описание",
+            date=event_date,
+            time=event_time,
+            location=location,
+            organizer=user,
+        )
+        for title in ("Рок-концерт", "Выставка")
+    ])
+
+    response = await async_client.get("/api/events/public", params={"search": "концерт"})
+
+    assert response.status_code == 200
+    assert [event["title"] for event in unwrap_items(response.json())] == ["Рок-концерт"]
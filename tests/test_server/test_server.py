@@ -1,120 +1,133 @@
-#uuuuu
-async def test_get_my_created_events(self, async_client: AsyncClient):
-    """Получение созданных пользователем событий"""
-    token = await self._register_and_get_token(async_client, "creator@example.com")
-
-    # Получаем ID пользователя
-    profile_response = await async_client.get(
-        "/api/users/me",
-        headers={"Authorization": f"Bearer {token}"},
-    )
-    user_id = profile_response.json()["id"]
-
-    # Создаем категорию и локацию для теста
-    category = await Category.create(name="Технологии")
-    location = await Location.create(
-        city="Москва",
-        street="Тверская",
-        house="1"
-    )
-
-    # Создаем события от имени пользователя
-    event1 = await Event.create(
-        title="Мое событие 1",
-        short_description="Короткое описание",
-        full_description="Полное описание",
-        date=datetime.now().date() + timedelta(days=7),
-        time=datetime.now().time(),
-        location=location,
-        organizer_id=user_id,
-        likes_count=5,
-        participants_count=10
-    )
-    await event1.categories.add(category)
-
-    # Получаем созданные события через API
-    response = await async_client.get(
-        "/api/events/me/created",
-        headers={"Authorization": f"Bearer {token}"},
-    )
-
-    assert response.status_code == 200
-    data = response.json()
-
-    # Проверяем структуру (может быть пагинация или список)
-    if isinstance(data, dict) and 'items' in data:
-        events = data['items']
-        # Проверяем поля пагинации
-        assert 'total' in data
-        assert 'page' in data
-        assert 'size' in data
-    else:
-        events = data
-
-    assert isinstance(events, list)
-    assert len(events) >= 1
-
-    # Проверяем, что событие принадлежит пользователю
-    assert events[0]["organizer"]["id"] == user_id
-    assert events[0]["title"] == "Мое событие 1"
-
-
-async def test_get_my_created_events_empty(self, async_client: AsyncClient):
-    """Получение созданных событий (когда их нет)"""
-    token = await self._register_and_get_token(async_client, "nocreated@example.com")
-
-    response = await async_client.get(
-        "/api/events/me/created",
-        headers={"Authorization": f"Bearer {token}"},
-    )
-
-    assert response.status_code == 200
-    data = response.json()
-
-    if isinstance(data, dict) and 'items' in data:
-        events = data['items']
-    else:
-        events = data
-
-    assert isinstance(events, list)
-    assert len(events) == 0
-
-
-async def test_get_my_liked_events_empty(self, async_client: AsyncClient):
-    """Получение лайкнутых событий (когда их нет)"""
-    token = await self._register_and_get_token(async_client, "nolikes@example.com")
-
-    response = await async_client.get(
-        "/api/events/me/liked",
-        headers={"Authorization": f"Bearer {token}"},
-    )
-
-    assert response.status_code == 200
-    data = response.json()
-
-    if isinstance(data, dict) and 'items' in data:
-        events = data['items']
-    else:
-        events = data
-
-    assert isinstance(events, list)
-
-
-async def test_get_my_registered_events_empty(self, async_client: AsyncClient):
-    """Получение событий, на которые пользователь зарегистрирован (когда их нет)"""
-    token = await self._register_and_get_token(async_client, "noreg@example.com")
-
-    response = await async_client.get(
-        "/api/events/me/registered",
-        headers={"Authorization": f"Bearer {token}"},
-    )
-
-    assert response.status_code == 200
-    data = response.json()
-
-    if isinstance(data, dict) and 'items' in data:
-        events = data['items']
-    else:
-        events = data
-
-    assert isinstance(events, list)
\ No newline at end of file
+# tests/test_server/test_server.py
+import asyncio
+from datetime import datetime, timedelta
+
+from httpx import AsyncClient
+
+from config import create_user_access_token
+from db.models import Category, Event, Location, User
+from tests.test_server.helpers import auth_headers, unwrap_items
+
+
+class TestMyEventsAPI:
+    """Тесты для списков событий текущего пользователя"""
+
+    async def _register_and_get_token(self, email: str) -> str:
+        """Создание пользователя напрямую в БД и выпуск токена (без /register)"""
+        user = await User.create(
+            email=email,
+            first_name="Тест",
+            last_name="Пользователь",
+            hashed_password="hashed_password",
+        )
+        return create_user_access_token(user)
+
+    async def test_get_my_created_events(self, async_client: AsyncClient):
+        """Получение созданных пользователем событий"""
+        # Пользователь создается напрямую в БД: id известен без запроса к /api/users/me
+        user = await User.create(
+            email="creator@example.com",
+            first_name="Тест",
+            last_name="Пользователь",
+            hashed_password="hashed_password",
+        )
+        user_id = user.id
+        token = create_user_access_token(user)
+
+        # Создаем категорию и локацию для теста
+        category, location = await asyncio.gather(
+            Category.create(name="Технологии"),
+            Location.create(city="Москва", street="Тверская", house="1"),
+        )
+
+        # Создаем события от имени пользователя
+        event1 = await Event.create(
+            title="Мое событие 1",
+            short_description="Короткое описание",
+            full_description="Полное описание",
+            date=datetime.now().date() + timedelta(days=7),
+            time=datetime.now().time(),
+            location=location,
+            organizer_id=user_id,
+            likes_count=5,
+            participants_count=10
+        )
+        await event1.categories.add(category)
+
+        # Получаем созданные события через API
+        response = await async_client.get(
+            "/api/events/me/created",
+            headers=auth_headers(token),
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+
+        # Проверяем структуру (может быть пагинация или список)
+        if isinstance(data, dict) and 'items' in data:
+            events = data['items']
+            # Проверяем поля пагинации
+            assert 'total' in data
+            assert 'page' in data
+            assert 'size' in data
+        else:
+            events = data
+
+        assert isinstance(events, list)
+        assert len(events) >= 1
+
+        # Проверяем, что событие принадлежит пользователю
+        assert events[0]["organizer"]["id"] == user_id
+        assert events[0]["title"] == "Мое событие 1"
+
+
+    async def test_get_my_created_events_empty(self, async_client: AsyncClient):
+        """Получение созданных событий (когда их нет)"""
+        token = await self._register_and_get_token("nocreated@example.com")
+
+        response = await async_client.get(
+            "/api/events/me/created",
+            headers=auth_headers(token),
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+
+        events = unwrap_items(data)
+
+        assert isinstance(events, list)
+        assert len(events) == 0
+
+
+    async def test_get_my_liked_events_empty(self, async_client: AsyncClient):
+        """Получение лайкнутых событий (когда их нет)"""
+        token = await self._register_and_get_token("nolikes@example.com")
+
+        response = await async_client.get(
+            "/api/events/me/liked",
+            headers=auth_headers(token),
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+
+        events = unwrap_items(data)
+
+        assert isinstance(events, list)
+
+
+    async def test_get_my_registered_events_empty(self, async_client: AsyncClient):
+        """Получение событий, на которые пользователь зарегистрирован (когда их нет)"""
+        token = await self._register_and_get_token("noreg@example.com")
+
+        response = await async_client.get(
+            "/api/events/me/registered",
+            headers=auth_headers(token),
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+
+        events = unwrap_items(data)
+
+        assert isinstance(events, list)
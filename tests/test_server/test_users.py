@@ -1,34 +1,46 @@
 # tests/test_server/test_users.py
+import re
+
 import pytest
 from httpx import AsyncClient
+import config
+from config import create_user_access_token
 from db.models import User, Event, Category, Location
 from datetime import datetime, timedelta
+from pydantic import TypeAdapter
+from tests.test_server.helpers import auth_headers
+
+# ISO 8601 (включая суффикс Z) разбирается в pydantic-core, без str.replace на Python < 3.11
+_parse_datetime = TypeAdapter(datetime).validate_python
+
+# Ключевые слова ошибки аутентификации
+_AUTH_ERROR_RE = re.compile(
+    r"forbidden|unauthorized|not authenticated|credentials|authentication|authorization",
+    re.IGNORECASE,
+)
 
 
 @pytest.mark.asyncio
 class TestUserAPI:
     """Тесты для API пользователя"""
 
-    async def _register_and_get_token(self, async_client: AsyncClient, email: str) -> str:
-        """Вспомогательный метод для регистрации и получения токена"""
-        response = await async_client.post(
-            "/api/auth/register",
-            json={
-                "email": email,
-                "first_name": "Тест",
-                "last_name": "Пользователь",
-                "password": "TestPass123!",
-            },
+    async def _register_and_get_token(self, email: str) -> str:
+        """Создание пользователя с паролем TestPass123! напрямую в БД и выпуск токена (без /register)"""
+        user = await User.create(
+            email=email,
+            first_name="Тест",
+            last_name="Пользователь",
+            hashed_password=config.get_password_hash("TestPass123!"),
         )
-        return response.json()["access_token"]
+        return create_user_access_token(user)
 
     async def test_get_my_profile_success(self, async_client: AsyncClient):
         """Успешное получение своего профиля"""
-        token = await self._register_and_get_token(async_client, "profile@example.com")
+        token = await self._register_and_get_token("profile@example.com")
 
         response = await async_client.get(
             "/api/users/me",
-            headers={"Authorization": f"Bearer {token}"},
+            headers=auth_headers(token),
         )
 
         assert response.status_code == 200
@@ -46,22 +58,6 @@ class TestUserAPI:
         assert "password" not in data
         assert "hashed_password" not in data
 
-    async def test_get_my_profile_unauthorized(self, async_client: AsyncClient):
-        """Попытка получить профиль без авторизации"""
-        response = await async_client.get("/api/users/me")
-
-        # Ожидаем ошибку аутентификации (401 или 403)
-        assert response.status_code in [401, 403]
-
-        data = response.json()
-        assert "detail" in data
-
-        # Проверяем содержание ошибки
-        error_text = data["detail"].lower()
-        auth_keywords = ["forbidden", "unauthorized", "not authenticated", "credentials"]
-        assert any(keyword in error_text for keyword in auth_keywords), \
-            f"Not an authentication error: {data['detail']}"
-
     async def test_get_my_profile_invalid_token(self, async_client: AsyncClient):
         """Попытка получить профиль с невалидным токеном"""
         response = await async_client.get(
@@ -73,19 +69,19 @@ class TestUserAPI:
 
     async def test_update_my_profile_success(self, async_client: AsyncClient):
         """Успешное обновление профиля"""
-        token = await self._register_and_get_token(async_client, "update@example.com")
+        token = await self._register_and_get_token("update@example.com")
 
         # Получаем текущий профиль
         get_response = await async_client.get(
             "/api/users/me",
-            headers={"Authorization": f"Bearer {token}"},
+            headers=auth_headers(token),
         )
         original_data = get_response.json()
 
         # Обновляем профиль
         response = await async_client.put(
             "/api/users/me",
-            headers={"Authorization": f"Bearer {token}"},
+            headers=auth_headers(token),
             json={
                 "first_name": "Обновленное",
                 "last_name": "Имя",
@@ -100,63 +96,55 @@ class TestUserAPI:
         assert data["email"] == "update@example.com"
         assert data["id"] == original_data["id"]
 
-        from datetime import datetime
-
-        original_updated = datetime.fromisoformat(original_data["updated_at"].replace('Z', '+00:00'))
-        new_updated = datetime.fromisoformat(data["updated_at"].replace('Z', '+00:00'))
+        original_updated = _parse_datetime(original_data["updated_at"])
+        new_updated = _parse_datetime(data["updated_at"])
 
         # Проверяем что новое время >= старого
         assert new_updated >= original_updated
 
     async def test_update_profile_empty_name(self, async_client: AsyncClient):
         """Обновление профиля с пустым именем"""
-        token = await self._register_and_get_token(async_client, "empty@example.com")
+        token = await self._register_and_get_token("empty@example.com")
 
         response = await async_client.put(
             "/api/users/me",
-            headers={"Authorization": f"Bearer {token}"},
+            headers=auth_headers(token),
             json={
                 "first_name": "",  # Пустое имя
                 "last_name": "Фамилия",
             },
         )
 
-        # Может быть 200 или 422 в зависимости от валидации
-        assert response.status_code in [200, 422]
-
-        if response.status_code == 422:
-            data = response.json()
-            assert "detail" in data
+        # Имя не может быть пустым (min_length=1)
+        assert response.status_code == 422
+        assert "detail" in response.json()
 
     async def test_update_profile_very_long_name(self, async_client: AsyncClient):
         """Обновление профиля с очень длинными именами"""
-        token = await self._register_and_get_token(async_client, "long@example.com")
+        token = await self._register_and_get_token("long@example.com")
 
         long_name = "А" * 101  # 101 символ
 
         response = await async_client.put(
             "/api/users/me",
-            headers={"Authorization": f"Bearer {token}"},
+            headers=auth_headers(token),
             json={
                 "first_name": long_name,
                 "last_name": "Фамилия",
             },
         )
 
-        # Может быть 200 или 422
-        assert response.status_code in [200, 422]
-
-        if response.status_code == 422:
-            data = response.json()
-            assert "detail" in data
+        # Имя ограничено 100 символами
+        assert response.status_code == 422
+        assert "detail" in response.json()
 
     async def test_update_profile_email_not_allowed(self, async_client: AsyncClient):
         """Попытка изменить email через обновление профиля"""
-        token = await self._register_and_get_token(async_client, "noemailchange@example.com")
+        token = await self._register_and_get_token("noemailchange@example.com")
 
         response = await async_client.put(
             "/api/users/me",
-            headers={"Authorization": f"Bearer {token}"},
+            headers=auth_headers(token),
             json={
                 "email": "newemail@example.com",  # Пытаемся изменить email
                 "first_name": "Новое",
@@ -176,12 +164,12 @@ class TestUserAPI:
 
     async def test_update_profile_partial_update(self, async_client: AsyncClient):
         """Частичное обновление профиля (только фамилия)"""
-        token = await self._register_and_get_token(async_client, "partial@example.com")
+        token = await self._register_and_get_token("partial@example.com")
 
         # Обновляем только фамилию
         response = await async_client.put(
             "/api/users/me",
-            headers={"Authorization": f"Bearer {token}"},
+            headers=auth_headers(token),
             json={
                 "last_name": "Толькофамилия",
                 # first_name не передаем
@@ -213,7 +201,7 @@ class TestUserAPI:
         # Меняем пароль
         response = await async_client.patch(
             "/api/users/me/password",
-            headers={"Authorization": f"Bearer {token}"},
+            headers=auth_headers(token),
             json={
                 "old_password": "OldPass123!",
                 "new_password": "NewPass456!",
@@ -246,13 +234,37 @@ class TestUserAPI:
 
         assert login_response.status_code == 200
 
+    async def test_change_password_keeps_profile_changed_elsewhere(self, async_client: AsyncClient):
+        """Смена пароля не перезаписывает профиль, измененный другим процессом"""
+        token = await self._register_and_get_token("concurrent@example.com")
+
+        response = await async_client.get("/api/users/me", headers=auth_headers(token))
+        assert response.status_code == 200
+
+        # Профиль меняется в обход этого процесса (например, другим воркером)
+        await User.filter(email="concurrent@example.com").update(first_name="Другое")
+
+        response = await async_client.patch(
+            "/api/users/me/password",
+            headers=auth_headers(token),
+            json={
+                "old_password": "TestPass123!",
+                "new_password": "NewPass456!",
+            },
+        )
+        assert response.status_code == 200
+
+        user = await User.get(email="concurrent@example.com")
+        assert user.first_name == "Другое"
+        assert config.verify_password("NewPass456!", user.hashed_password)
+
     async def test_change_password_wrong_old_password(self, async_client: AsyncClient):
         """Смена пароля с неправильным старым паролем"""
-        token = await self._register_and_get_token(async_client, "wrongold@example.com")
+        token = await self._register_and_get_token("wrongold@example.com")
 
         response = await async_client.patch(
             "/api/users/me/password",
-            headers={"Authorization": f"Bearer {token}"},
+            headers=auth_headers(token),
             json={
                 "old_password": "WrongPass123!",  # Неправильный
                 "new_password": "NewPass456!",
@@ -267,58 +279,46 @@ class TestUserAPI:
 
     async def test_change_password_weak_new_password(self, async_client: AsyncClient):
         """Смена пароля на слабый новый пароль"""
-        token = await self._register_and_get_token(async_client, "weaknew@example.com")
+        token = await self._register_and_get_token("weaknew@example.com")
 
         response = await async_client.patch(
             "/api/users/me/password",
-            headers={"Authorization": f"Bearer {token}"},
+            headers=auth_headers(token),
             json={
                 "old_password": "TestPass123!",
                 "new_password": "123",  # Слишком короткий
             },
         )
 
-        # Может быть 200 или 422
-        assert response.status_code in [200, 400, 422]
-
-        if response.status_code != 200:
-            data = response.json()
-            assert "detail" in data
+        # Новый пароль проверяется схемой до обращения к БД
+        assert response.status_code == 422
+        assert "detail" in response.json()
 
     async def test_change_password_same_password(self, async_client: AsyncClient):
         """Смена пароля на тот же самый"""
-        token = await self._register_and_get_token(async_client, "samepass@example.com")
+        token = await self._register_and_get_token("samepass@example.com")
 
         response = await async_client.patch(
             "/api/users/me/password",
-            headers={"Authorization": f"Bearer {token}"},
+            headers=auth_headers(token),
             json={
                 "old_password": "TestPass123!",
                 "new_password": "TestPass123!",  # Тот же самый
             },
         )
 
-        # Может быть 200, 400 или 422
-        if response.status_code == 400:
-            data = response.json()
-            assert "detail" in data
-        elif response.status_code == 422:
-            data = response.json()
-            assert "detail" in data
-        elif response.status_code == 200:
-            # Если разрешено менять на тот же пароль
-            pass
-        else:
-            assert response.status_code != 500
+        # Эндпоинт запрещает менять пароль на тот же самый
+        assert response.status_code == 400
+        assert "detail" in response.json()
 
     async def test_change_password_missing_fields(self, async_client: AsyncClient):
         """Смена пароля без обязательных полей"""
-        token = await self._register_and_get_token(async_client, "missing@example.com")
+        token = await self._register_and_get_token("missing@example.com")
 
         # Без old_password
         response = await async_client.patch(
             "/api/users/me/password",
-            headers={"Authorization": f"Bearer {token}"},
+            headers=auth_headers(token),
             json={
                 "new_password": "NewPass456!",
             },
@@ -329,7 +329,7 @@ class TestUserAPI:
         # Без new_password
         response = await async_client.patch(
             "/api/users/me/password",
-            headers={"Authorization": f"Bearer {token}"},
+            headers=auth_headers(token),
             json={
                 "old_password": "TestPass123!",
             },
@@ -337,31 +337,39 @@ class TestUserAPI:
 
         assert response.status_code == 422
 
-    async def test_user_endpoints_require_auth(self, async_client: AsyncClient):
-        """Все endpoints пользователя требуют авторизации"""
-        endpoints = [
+    @pytest.mark.parametrize(
+        ("method", "endpoint"),
+        [
             ("GET", "/api/users/me"),
             ("PUT", "/api/users/me"),
             ("PATCH", "/api/users/me/password"),
-        ]
+            ("POST", "/api/locations/"),
+        ],
+    )
+    async def test_endpoint_requires_auth(self, async_client: AsyncClient, method, endpoint):
+        """Endpoints требуют авторизации и возвращают ошибку аутентификации"""
+        response = await async_client.request(
+            method, endpoint, json=None if method == "GET" else {}
+        )
 
-        for method, endpoint in endpoints:
-            if method == "GET":
-                response = await async_client.get(endpoint)
-            elif method == "PUT":
-                response = await async_client.put(endpoint, json={})
-            elif method == "PATCH":
-                response = await async_client.patch(endpoint, json={})
+        # Ожидаем ошибку аутентификации (401 или 403)
+        assert response.status_code in [401, 403], \
+            f"{method} {endpoint} должен требовать авторизацию, получили {response.status_code}"
 
-            assert response.status_code in [401, 403], f"{method} {endpoint} должен требовать авторизацию, получили {response.status_code}"
+        data = response.json()
+        assert "detail" in data
+
+        # Проверяем содержание ошибки
+        assert _AUTH_ERROR_RE.search(data["detail"]), \
+            f"Not an authentication error: {data['detail']}"
 
     async def test_profile_serialization_format(self, async_client: AsyncClient):
         """Проверка формата сериализации профиля пользователя"""
-        token = await self._register_and_get_token(async_client, "format@example.com")
+        token = await self._register_and_get_token("format@example.com")
 
         response = await async_client.get(
             "/api/users/me",
-            headers={"Authorization": f"Bearer {token}"},
+            headers=auth_headers(token),
         )
 
         assert response.status_code == 200
@@ -378,8 +386,8 @@ class TestUserAPI:
         # Проверяем формат дат (ISO 8601 или похожий)
         try:
             # Пробуем разные форматы
-            datetime.fromisoformat(data["created_at"].replace('Z', '+00:00'))
-            datetime.fromisoformat(data["updated_at"].replace('Z', '+00:00'))
+            _parse_datetime(data["created_at"])
+            _parse_datetime(data["updated_at"])
         except ValueError:
             # Если не ISO, проверяем что это строка
             assert isinstance(data["created_at"], str)
@@ -387,11 +395,11 @@ class TestUserAPI:
 
     async def test_update_nonexistent_fields(self, async_client: AsyncClient):
         """Попытка обновить несуществующие поля профиля"""
-        token = await self._register_and_get_token(async_client, "extra@example.com")
+        token = await self._register_and_get_token("extra@example.com")
 
         response = await async_client.put(
             "/api/users/me",
-            headers={"Authorization": f"Bearer {token}"},
+            headers=auth_headers(token),
             json={
                 "first_name": "Новое",
                 "last_name": "Имя",
@@ -407,26 +415,28 @@ class TestUserAPI:
         assert "extra_field" not in data
         assert "another_extra" not in data
 
-    async def test_password_change_requires_strong_password(self, async_client: AsyncClient):
-        """Смена пароля требует надежный пароль"""
-        token = await self._register_and_get_token(async_client, "strongpass@example.com")
-
-        # Пытаемся сменить на слабый пароль
-        weak_passwords = [
+    @pytest.mark.parametrize(
+        "weak_password",
+        [
             "123",  # слишком короткий
             "password",  # нет цифр
             "12345678",  # только цифры
-        ]
-
-        for weak_password in weak_passwords:
-            response = await async_client.patch(
-                "/api/users/me/password",
-                headers={"Authorization": f"Bearer {token}"},
-                json={
-                    "old_password": "TestPass123!",
-                    "new_password": weak_password,
-                },
-            )
-
-            # Может быть 200 или ошибка
-            assert response.status_code in [200, 400, 422]
\ No newline at end of file
+        ],
+        ids=["too_short", "no_digits", "digits_only"],
+    )
+    async def test_password_change_requires_strong_password(self, async_client: AsyncClient, weak_password):
+        """Смена пароля требует надежный пароль"""
+        token = await self._register_and_get_token("strongpass@example.com")
+
+        # Пытаемся сменить на слабый пароль
+        response = await async_client.patch(
+            "/api/users/me/password",
+            headers=auth_headers(token),
+            json={
+                "old_password": "TestPass123!",
+                "new_password": weak_password,
+            },
+        )
+
+        # Слабый пароль отклоняется валидацией схемы
+        assert response.status_code == 422